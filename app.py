@@ -1,77 +1,326 @@
-from flask import Flask, render_template, jsonify, request, Response, abort, stream_with_context, url_for
+from flask import (
+    Flask, render_template, jsonify, request, Response, abort, send_file, stream_template, url_for, g,
+    has_request_context,
+)
 from flask_cors import CORS
-from datetime import datetime, timedelta
-import requests
-from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+import hashlib
+import json
+import time
 import config
+import metrics
 from db import (
-    init_db, mark_done, re_add, get_all_done_ids,
-    get_shopping_ids, add_shopping_items
+    init_db, mark_done, re_add, get_done_ids, prune_done_meals,
+    mark_done_many, re_add_many, get_done_page,
+    get_mirrored_meals, get_shopping_ids, get_shopping_items, update_shopping_items,
+    get_unsynced_shopping_items, get_og_sync_job, prune_og_sync_jobs
 )
 from config_manager import save_config_var
-import ourgroceries_helper as og
+from cache import RecipeCache
+from mealie_client import MealieClient, MealieError
+from meal_plan_mirror import MealPlanMirror, row_to_item
+from recipe_index import RecipeIndex
+from image_cache import ImageCache
+import image_variants
+from logging_config import get_logger
+import og_sync
+import profiling
+from prefetch import Prefetcher
+from resilience import BackgroundRefresher, SingleFlight
+
+logger = get_logger(__name__)
 
 app = Flask(__name__)
 CORS(app)
 init_db()
 
-def get_meal_plan(start_date=None, end_date=None):
-    headers = {"Authorization": f"Bearer {config.MEALIE_API_TOKEN}"}
-    
-    params = {}
-    if start_date:
-        params["start_date"] = start_date
-    if end_date:
-        params["end_date"] = end_date
+mealie = MealieClient.from_config()
+# Refreshes stale meal plans, recipes and images off the request path
+refresher = BackgroundRefresher(
+    retry_delay=config.REFRESH_RETRY_DELAY,
+    max_attempts=config.REFRESH_MAX_ATTEMPTS,
+    name="mealie-refresh",
+)
+# Concurrent fetches of the same recipe or image share one upstream request
+recipe_flights = SingleFlight("recipes")
+image_flights = SingleFlight("images")
+variant_flights = SingleFlight("image_variants")
+# Variant key -> variant ETag whose source could not be made smaller, so the
+# source is served without opening it again until its ETag changes
+passthrough_variants = {}
+recipe_cache = RecipeCache(maxsize=config.RECIPE_CACHE_SIZE, ttl=config.RECIPE_CACHE_TTL)
+meal_plan_mirror = MealPlanMirror(
+    mealie,
+    max_age=config.MEAL_PLAN_MIRROR_MAX_AGE,
+    page_size=config.MEAL_PLAN_PAGE_SIZE,
+    page_workers=config.MEAL_PLAN_PAGE_WORKERS,
+    refresher=refresher,
+)
+recipe_index = RecipeIndex(
+    mealie,
+    max_age=config.RECIPE_INDEX_MAX_AGE,
+    page_size=config.RECIPE_INDEX_PAGE_SIZE,
+    refresher=refresher,
+)
+image_cache = ImageCache(
+    config.IMAGE_CACHE_DIR,
+    max_bytes=config.IMAGE_CACHE_MAX_MB * 1024 * 1024,
+    ttl=config.IMAGE_CACHE_TTL,
+)
+
+def plan_window():
+    """Return the configured (start_date, end_date) window, or (None, None) for all."""
+    config.reload_json_config()
+    if config.DAYS_AFTER > 0 or config.DAYS_BEFORE > 0:
+        today = datetime.now().date()
+        start = today - timedelta(days=config.DAYS_BEFORE)
+        end = today + timedelta(days=config.DAYS_AFTER)
+        return start.isoformat(), end.isoformat()
+    return None, None
+
+
+def image_urls(recipe_id):
+    """
+    Return ``(src, srcset)`` for a recipe image. Once the image is cached the
+    URLs carry its version, so browsers may keep them forever.
+    """
+    etag = image_cache.current_etag(recipe_id)
+    params = {"v": image_variants.version(etag)} if etag else {}
+    src = url_for("proxy_recipe_image", recipe_id=recipe_id, size="card", **params)
+    srcset = ", ".join(
+        f"{url_for('proxy_recipe_image', recipe_id=recipe_id, size=name, **params)} {width}w"
+        for name, width in image_variants.VARIANTS.items()
+    )
+    return src, srcset
+
+
+def decorate_meal(item):
+    """Add the image and ``recipe_url`` links the templates use to a meal plan item."""
+    recipe = item.get("recipe") or {}
+    _id = recipe.get("id")
+    slug = recipe.get("slug")
+    if _id:
+        item["image_url"], item["image_srcset"] = image_urls(_id)
+    else:
+        item["image_url"] = item["image_srcset"] = None
+    if slug:
+        item["recipe_url"] = f"{config.MEALIE_URL}/g/home/r/{slug}"
+    else:
+        item["recipe_url"] = None
+    return item
+
+
+def _refresh_recipe(slug, entry=None):
+    """
+    Fetch ``slug`` from Mealie into the recipe cache, revalidating ``entry``
+    with ``If-None-Match``/``If-Modified-Since`` so unchanged recipes are not
+    downloaded again. Concurrent calls for the same slug share one request.
+
+    Raises:
+        MealieError: If the recipe cannot be fetched
+    """
+    return recipe_flights.do(slug, lambda: _download_recipe(slug, entry))
+
+
+def _download_recipe(slug, entry):
+    result = mealie.get_recipe(
+        slug,
+        etag=entry.etag if entry else None,
+        last_modified=entry.last_modified if entry else None,
+        timeout=config.RECIPE_FETCH_TIMEOUT,
+    )
+    if result.not_modified and entry is not None:
+        recipe_cache.touch(slug)
+        return entry.value
+
+    recipe_cache.set(slug, result.data, etag=result.etag, last_modified=result.last_modified)
+    return result.data
+
 
-    query_string = f"?{urlencode(params)}" if params else ""
-    url = f"{config.MEALIE_API_URL}/api/households/mealplans{query_string}"
+def get_recipe(slug):
+    """
+    Return the full recipe for ``slug`` from the recipe cache.
 
-    response = requests.get(url, headers=headers)
+    A stale entry is returned as it is and revalidated in the background, so
+    pages keep rendering while Mealie is slow or down. Only recipes that were
+    never cached are fetched inline.
 
+    Raises:
+        MealieError: If the recipe is not cached and cannot be fetched
+    """
+    entry = recipe_cache.peek(slug)
+    if entry is None:
+        return _refresh_recipe(slug)
+    if not entry.is_fresh(recipe_cache.ttl):
+        refresher.submit(("recipe", slug), lambda: _refresh_recipe(slug, entry))
+    return entry.value
+
+
+def _fetch_recipe(slug):
+    """Fetch a single recipe for the thread pool. Returns (recipe, MealieError)."""
     try:
-        data = response.json()
-    except Exception:
-        return {
-            "error": "Invalid JSON response",
-            "status_code": response.status_code,
-            "response_text": response.text,
-            "url": url
-        }, response.status_code
-
-    for item in data.get("items", []):
-        recipe = item.get("recipe", {})
-        _id = recipe.get("id")
-        slug = recipe.get("slug")
-        if _id:
-            item["image_url"] = url_for("proxy_recipe_image", recipe_id=_id, _external=False)
+        return get_recipe(slug), None
+    except MealieError as e:
+        return None, e
+
+
+def resolve_recipes(slugs):
+    """
+    Return recipe summaries (at least ``id`` and ``slug``) for ``slugs``.
+
+    Slugs are looked up in the local recipe index; only slugs it does not
+    know yet are fetched in full, concurrently, and then added to it.
+
+    Returns:
+        tuple: (summaries by slug, MealieError by slug for slugs that failed)
+    """
+    recipe_index.refresh()
+    found = recipe_index.lookup(slugs)
+    missing = [slug for slug in dict.fromkeys(slugs) if slug not in found]
+    errors = {}
+    if not missing:
+        return found, errors
+
+    workers = max(1, min(config.RECIPE_FETCH_WORKERS, len(missing)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for slug, (recipe, error) in zip(missing, pool.map(_fetch_recipe, missing)):
+            if error is not None:
+                errors[slug] = error
+            else:
+                found[slug] = recipe
+    recipe_index.record(found[slug] for slug in missing if slug in found)
+    return found, errors
+
+
+def iter_recipes(slugs):
+    """
+    Fetch full recipes for the given slugs concurrently, yielding each one as
+    soon as it arrives.
+
+    Yields:
+        tuple: (index into ``slugs``, slug, recipe or None, error or None)
+    """
+    if not slugs:
+        return
+
+    workers = max(1, min(config.RECIPE_FETCH_WORKERS, len(slugs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_fetch_recipe, slug): i for i, slug in enumerate(slugs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            recipe, error = future.result()
+            if error is not None:
+                error = f"HTTP {error.status_code}" if error.status_code else str(error)
+            yield i, slugs[i], recipe, error
+
+
+def fetch_recipes(slugs):
+    """
+    Fetch full recipes for the given slugs concurrently.
+
+    Results keep the order of ``slugs``. Slugs that could not be fetched are
+    reported in ``failed`` as ``{"slug": ..., "error": ...}`` dicts.
+
+    Returns:
+        tuple: (recipes, failed)
+    """
+    results = sorted(iter_recipes(slugs), key=lambda result: result[0])
+
+    recipes, failed = [], []
+    for _, slug, recipe, error in results:
+        if error:
+            failed.append({"slug": slug, "error": error})
         else:
-            item["image_url"] = None
-        if slug:
-            item["recipe_url"] = f"{config.MEALIE_URL}/g/home/r/{slug}"
+            recipes.append(recipe)
+    return recipes, failed
+
+
+def note_stale():
+    """Flag the current request as served from data that could not be refreshed."""
+    if has_request_context():
+        g.stale_data = True
+
+
+def data_is_stale():
+    """True if this request used stale data or Mealie is currently unreachable."""
+    return bool(g.get("stale_data")) or not mealie.available
+
+
+def upcoming_meals():
+    """Return the meal plan items in the configured window that are not done."""
+    start, end = plan_window()
+    if not meal_plan_mirror.ensure(start, end):
+        note_stale()
+    return [decorate_meal(row_to_item(row)) for row in get_mirrored_meals(start, end, done=False)]
+
+
+def done_window(rows):
+    """
+    Return the smallest (start_date, end_date) window containing the meals in
+    ``rows`` (from ``get_done_page``), or (None, None) if it is unbounded.
+
+    A meal without a recorded date was on the meal plan page when it was
+    marked done, so it lies within the configured window around ``done_at``.
+    """
+    config.reload_json_config()
+    starts, ends = [], []
+    for row in rows:
+        if row["meal_date"]:
+            starts.append(row["meal_date"])
+            ends.append(row["meal_date"])
+        elif config.DAYS_BEFORE > 0 or config.DAYS_AFTER > 0:
+            done_day = date.fromisoformat(row["done_at"][:10])
+            starts.append((done_day - timedelta(days=config.DAYS_BEFORE)).isoformat())
+            ends.append((done_day + timedelta(days=config.DAYS_AFTER)).isoformat())
         else:
-            item["recipe_url"] = None
+            return None, None
+    if not starts:
+        return None, None
+    return min(starts), max(ends)
+
+
+def done_meals(page=1):
+    """
+    Return one page of done meals from the local mirror.
+
+    Done meals that are not mirrored yet (e.g. from before the mirror
+    existed) are synced from Mealie once, for only the date range they span.
+
+    Returns:
+        dict: ``items`` (meal plan items, most recent first), ``page``,
+        ``pages`` and ``total``
+    """
+    rows, total = get_done_page(page, config.DONE_PAGE_SIZE)
+    missing = [row for row in rows if row["entry"] is None]
+    if missing:
+        if not meal_plan_mirror.ensure(*done_window(missing)):
+            note_stale()
+        rows, total = get_done_page(page, config.DONE_PAGE_SIZE)
+
+    return {
+        "items": [decorate_meal(row_to_item(row["entry"])) for row in rows if row["entry"]],
+        "page": page,
+        "pages": max(1, -(-total // config.DONE_PAGE_SIZE)),
+        "total": total,
+    }
 
-    return data
+
+def _meal_date(value):
+    """Return ``value`` if it is an ISO date (YYYY-MM-DD), else None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
 
 
 @app.route("/")
 def index():
-    if config.DAYS_AFTER > 0 or config.DAYS_BEFORE > 0:
-        today = datetime.now().date()
-        start = today - timedelta(days=config.DAYS_BEFORE)
-        end = today + timedelta(days=config.DAYS_AFTER)
-        data = get_meal_plan(start.isoformat(), end.isoformat())
-    else:
-        data = get_meal_plan()
-    done_ids = set(get_all_done_ids())
-    visible_items = [
-        item for item in data.get("items", [])
-        if item.get("id") not in done_ids
-    ]
     return render_template(
         "index.html",
-        items=visible_items,
+        items=upcoming_meals(),
         current_page="index",
     )
 
@@ -79,6 +328,7 @@ def index():
 @app.route("/settings", methods=["GET", "POST"])
 def settings():
     message = None
+    config.reload_json_config()
     if request.method == "POST":
         days_before = int(request.form.get("days_before", 7))
         days_after = int(request.form.get("days_after", 7))
@@ -100,22 +350,24 @@ def settings():
 
 @app.route("/remove/<int:item_id>", methods=["POST"])
 def remove_meal(item_id):
-    headers = {"Authorization": f"Bearer {config.MEALIE_API_TOKEN}"}
-    url = f"{config.MEALIE_API_URL}/api/households/mealplans/{item_id}"
-    response = requests.delete(url, headers=headers)
-    if response.ok:
-        return jsonify({"success": True})
-    else:
+    try:
+        mealie.delete_meal_plan(item_id)
+    except MealieError as e:
         return jsonify({
             "success": False,
-            "status_code": response.status_code,
-            "message": response.text
+            "status_code": e.status_code,
+            "message": str(e)
         }), 400
+    meal_plan_mirror.record_deleted([item_id])
+    return jsonify({"success": True})
 
 
 @app.route("/done/<int:item_id>", methods=["POST"])
 def mark_meal_done(item_id):
-    mark_done(item_id)
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify(success=False, message="Expected JSON body {\"date\": \"YYYY-MM-DD\"}"), 400
+    mark_done(item_id, _meal_date(data.get("date")))
     return jsonify({"success": True})
 
 
@@ -125,159 +377,623 @@ def readd_meal(item_id):
     return jsonify({"success": True})
 
 
+def _bulk_meal_ids():
+    """Return the ``ids`` list from a bulk request body, or None if it is malformed."""
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids") if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return None
+    return ids
+
+
+@app.route("/remove/bulk", methods=["POST"])
+def remove_meals():
+    ids = _bulk_meal_ids()
+    if ids is None:
+        return jsonify(success=False, message="Expected JSON body {\"ids\": [int, ...]}"), 400
+
+    errors = mealie.delete_meal_plans(ids, max_workers=config.MEALIE_BULK_WORKERS)
+    meal_plan_mirror.record_deleted([i for i, error in errors.items() if error is None])
+
+    results = []
+    for item_id, error in errors.items():
+        if error is None:
+            results.append({"id": item_id, "success": True})
+        else:
+            results.append({
+                "id": item_id,
+                "success": False,
+                "status_code": error.status_code,
+                "message": str(error)
+            })
+    return jsonify(success=all(r["success"] for r in results), results=results)
+
+
+@app.route("/done/bulk", methods=["POST"])
+def mark_meals_done():
+    ids = _bulk_meal_ids()
+    if ids is None:
+        return jsonify(success=False, message="Expected JSON body {\"ids\": [int, ...]}"), 400
+    # _bulk_meal_ids has checked that the body is an object
+    dates = request.get_json(silent=True).get("dates") or {}
+    meal_dates = {}
+    if isinstance(dates, dict):
+        for item_id in ids:
+            meal_date = _meal_date(dates.get(str(item_id)))
+            if meal_date:
+                meal_dates[item_id] = meal_date
+    changed = mark_done_many(ids, meal_dates)
+    return jsonify(
+        success=True,
+        results=[{"id": i, "success": True, "changed": c} for i, c in changed.items()]
+    )
+
+
+@app.route("/readd/bulk", methods=["POST"])
+def readd_meals():
+    ids = _bulk_meal_ids()
+    if ids is None:
+        return jsonify(success=False, message="Expected JSON body {\"ids\": [int, ...]}"), 400
+    changed = re_add_many(ids)
+    return jsonify(
+        success=True,
+        results=[{"id": i, "success": True, "changed": c} for i, c in changed.items()]
+    )
+
+
 @app.route("/done")
 def view_done():
-    data = get_meal_plan()
-    done_ids = set(get_all_done_ids())
-    done_items = [
-        item for item in data.get("items", [])
-        if item.get("id") in done_ids
-    ]
+    page = max(1, request.args.get("page", 1, type=int))
+    done = done_meals(page)
     return render_template(
         "done.html",
-        items=done_items,
+        items=done["items"],
+        page=done["page"],
+        pages=done["pages"],
         current_page="done"
     )
 
 
-@app.route("/shopping-list")
-def shopping_list():
-    if config.DAYS_AFTER > 0 or config.DAYS_BEFORE > 0:
-        today = datetime.now().date()
-        start = today - timedelta(days=config.DAYS_BEFORE)
-        end = today + timedelta(days=config.DAYS_AFTER)
-        data = get_meal_plan(start.isoformat(), end.isoformat())
-    else:
-        data = get_meal_plan()
-
-    done_ids = set(get_all_done_ids())
-    upcoming = [
-        item for item in data.get("items", [])
-        if item.get("id") not in done_ids
-    ]
-
-    # 3. For each slug, fetch full recipe & grab its ingredient list
-    headers = {"Authorization": f"Bearer {config.MEALIE_API_TOKEN}"}
-    recipes = []
-    for item in upcoming:
-        slug = item["recipe"]["slug"]
-        resp = requests.get(
-            f"{config.MEALIE_API_URL}/api/recipes/{slug}", headers=headers
-        )
-        if not resp.ok:
+def _shopping_sections(slugs, failed):
+    """
+    Yield a template-ready dict per recipe as soon as it is fetched. ``order``
+    is the meal's position, which the page uses to restore the meal order.
+    Failures are appended to ``failed``.
+    """
+    for i, slug, recipe, error in iter_recipes(slugs):
+        if error:
+            failed.append({"slug": slug, "error": error})
             continue
-        recipe = resp.json()
         ingredients = [
             {"id": ing.get("referenceId"), "display": ing.get("display")}
             for ing in recipe.get("recipeIngredient", [])
         ]
-        recipes.append({
+        yield {
+            "order": i,
             "name": recipe.get("name"),
             "ingredients": ingredients
-        })
+        }
 
-    shopping_ids = get_shopping_ids()
 
-    return render_template(
-        "shopping_list.html",
-        recipes=recipes,
-        shopping_ids=shopping_ids,
+# Marks the end of a chunk the streamed shopping list should send right away
+FLUSH_MARKER = "<!--flush-->"
+
+def _flush_at_markers(chunks):
+    """Coalesce streamed template output into one write per FLUSH_MARKER."""
+    buffer = []
+    for chunk in chunks:
+        buffer.append(chunk)
+        if FLUSH_MARKER in chunk:
+            yield "".join(buffer)
+            buffer.clear()
+    if buffer:
+        yield "".join(buffer)
+
+
+@app.route("/shopping-list")
+def shopping_list():
+    upcoming = upcoming_meals()
+
+    # Fetch all recipes in parallel & grab their ingredient lists
+    slugs = [item["recipe"]["slug"] for item in upcoming if item.get("recipe", {}).get("slug")]
+    failed = []
+    context = dict(
+        recipes=_shopping_sections(slugs, failed),
+        failed=failed,
+        shopping_ids=get_shopping_ids(),
         current_page="shopping_list"
     )
 
+    if not config.SHOPPING_LIST_STREAM:
+        return render_template("shopping_list.html", **context)
+
+    # Send the page shell now and each recipe section as soon as it arrives
+    resp = Response(
+        _flush_at_markers(stream_template("shopping_list.html", **context)),
+        mimetype="text/html"
+    )
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
+def _delta_counts(delta):
+    return {key: len(value) for key, value in delta.items()}
 
 @app.route("/shopping-list/add", methods=["POST"])
 def add_to_shopping_list():
     data = request.get_json() or {}
     items = data.get("ingredients", [])
     db_items = [(itm["id"], itm["name"]) for itm in items]
-    add_shopping_items(db_items)
-    return jsonify({"success": True})
+    delta = update_shopping_items(db_items)
+    return jsonify(success=True, **_delta_counts(delta))
 
 @app.route("/shopping-list/add-og", methods=["POST"])
 def add_to_ourgroceries():
     data = request.get_json() or {}
     items = data.get("ingredients", [])
-    # 1) save to local DB exactly like add_to_shopping_list()
+    # 1) save the delta to the local DB exactly like add_to_shopping_list()
     db_items = [(itm["id"], itm["name"]) for itm in items]
-    add_shopping_items(db_items)
-
-    # 2) push to OurGroceries
-    try:
-        names = [itm["name"] for itm in items]
-        og.send_items_to_og_sync(config.OG_LIST_NAME, names)
-    except Exception as e:
-        return jsonify(success=False, message=str(e)), 500
+    delta = update_shopping_items(db_items)
+
+    # 2) queue the items OurGroceries hasn't received yet; a background worker sends them
+    pending = get_unsynced_shopping_items()
+    job_id = og_sync.enqueue(config.OG_LIST_NAME, pending) if pending else None
+    if job_id is None:
+        return jsonify(success=True, job_id=None, queued=0, **_delta_counts(delta))
+
+    return jsonify(
+        success=True,
+        job_id=job_id,
+        queued=len(pending),
+        status_url=url_for("og_sync_status", job_id=job_id),
+        **_delta_counts(delta)
+    ), 202
+
+@app.route("/shopping-list/og-jobs/<int:job_id>")
+def og_sync_status(job_id):
+    job = get_og_sync_job(job_id)
+    if job is None:
+        return jsonify(success=False, message=f"Unknown job {job_id}"), 404
+    return jsonify(success=True, **job)
+
+def _default_plan_date():
+    return (datetime.now().date() + timedelta(days=7)).isoformat()
+
+
+def _plan_entry(data):
+    """
+    Return ``(date, entry_type)`` from an add request's JSON fields, or None
+    if they are malformed. The date defaults to a week from today and the
+    entry type to dinner.
+    """
+    target_date = _meal_date(data.get("date")) if data.get("date") is not None else _default_plan_date()
+    entry_type = data.get("entryType", "dinner")
+    if target_date is None or not isinstance(entry_type, str) or not entry_type:
+        return None
+    return target_date, entry_type
+
+
+@app.route("/add/bulk", methods=["POST"])
+def add_many_to_plan():
+    data = request.get_json(silent=True) or {}
+    entries = data.get("entries") if isinstance(data, dict) else None
+    parsed = []
+    if isinstance(entries, list):
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get("slug"), str) or not entry["slug"]:
+                break
+            plan = _plan_entry(entry)
+            if plan is None:
+                break
+            parsed.append((entry["slug"], *plan))
+    if not isinstance(entries, list) or len(parsed) != len(entries):
+        return jsonify(
+            success=False,
+            message="Expected JSON body {\"entries\": [{\"slug\": str, \"date\": \"YYYY-MM-DD\", \"entryType\": str}, ...]}"
+        ), 400
+
+    recipes, errors = resolve_recipes([slug for slug, _, _ in parsed])
+    to_create = [
+        (i, (target_date, recipes[slug]["id"], entry_type))
+        for i, (slug, target_date, entry_type) in enumerate(parsed)
+        if slug in recipes and recipes[slug].get("id")
+    ]
+    created = mealie.create_meal_plans(
+        [entry for _, entry in to_create], max_workers=config.MEALIE_BULK_WORKERS
+    )
+    outcomes = dict(zip((i for i, _ in to_create), created))
+
+    results = []
+    for i, (slug, target_date, entry_type) in enumerate(parsed):
+        result = {"slug": slug, "date": target_date, "entryType": entry_type}
+        outcome = outcomes.get(i)
+        if slug in errors:
+            error = errors[slug]
+            result.update(success=False, status_code=error.status_code,
+                          message=f"Could not fetch recipe “{slug}”: {error}")
+        elif outcome is None:
+            result.update(success=False, status_code=None, message="Missing recipe ID")
+        elif isinstance(outcome, MealieError):
+            result.update(success=False, status_code=outcome.status_code, message=str(outcome))
+        else:
+            meal_plan_mirror.record_created(outcome, recipes[slug])
+            result.update(success=True, id=outcome.get("id"))
+        results.append(result)
+    return jsonify(success=all(r["success"] for r in results), results=results)
 
-    return jsonify(success=True)
 
 @app.route("/add/<slug>", methods=["POST"])
 def add_to_plan(slug):
-    headers = {
-        "Authorization": f"Bearer {config.MEALIE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    recipe_resp = requests.get(
-        f"{config.MEALIE_API_URL}/api/recipes/{slug}", headers=headers
-    )
-    if not recipe_resp.ok:
+    data = request.get_json(silent=True) or {}
+    plan = _plan_entry(data) if isinstance(data, dict) else None
+    if plan is None:
+        return jsonify(success=False, message="Expected \"date\" as YYYY-MM-DD and \"entryType\" as a string"), 400
+    target_date, entry_type = plan
+
+    recipes, errors = resolve_recipes([slug])
+    if slug in errors:
+        e = errors[slug]
         return jsonify(
             success=False,
-            message=f"Could not fetch recipe “{slug}”: {recipe_resp.text}"
-        ), recipe_resp.status_code
+            message=f"Could not fetch recipe “{slug}”: {e}"
+        ), e.status_code or 502
 
-    recipe = recipe_resp.json()
+    recipe = recipes[slug]
     recipe_id = recipe.get("id")
     if not recipe_id:
         return jsonify(success=False, message="Missing recipe ID"), 500
 
-    target_date = (datetime.now().date() + timedelta(days=7)).isoformat()
-    payload = {
-        "date":       target_date,
-        "recipeId":   recipe_id,
-        "entryType":  "dinner"
-    }
-    add_resp = requests.post(
-        f"{config.MEALIE_API_URL}/api/households/mealplans",
-        headers=headers, json=payload
+    try:
+        created = mealie.create_meal_plan(target_date, recipe_id, entry_type)
+    except MealieError as e:
+        return jsonify(success=False, message=str(e)), e.status_code or 502
+    meal_plan_mirror.record_created(created, recipe)
+    return jsonify(success=True), 201
+
+def _json_with_etag(payload):
+    """
+    Return ``payload`` as JSON with a strong ETag derived from its content,
+    answering a matching ``If-None-Match`` with 304 Not Modified.
+    """
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(hashlib.sha256(body.encode()).hexdigest()[:32])
+    # Clients may keep the body but must revalidate before using it
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+@app.route("/api/meals")
+def api_meals():
+    items = upcoming_meals()
+    return _json_with_etag({"items": items, "stale": data_is_stale()})
+
+@app.route("/api/done")
+def api_done():
+    page = max(1, request.args.get("page", 1, type=int))
+    page_data = done_meals(page)
+    return _json_with_etag({**page_data, "done_ids": sorted(get_done_ids()), "stale": data_is_stale()})
+
+@app.route("/api/shopping-list")
+def api_shopping_list():
+    items = [
+        {"id": ingredient_id, "name": name, "og_synced": synced_at is not None}
+        for ingredient_id, name, synced_at in get_shopping_items()
+    ]
+    return _json_with_etag({"items": items})
+
+@app.route("/cache-stats")
+def cache_stats():
+    return jsonify(
+        recipes=recipe_cache.stats(),
+        images=image_cache.stats(),
+        mealie_circuit=mealie.breaker.stats() if mealie.breaker else None,
+        refresher=refresher.stats(),
+        single_flight={
+            flights.name: flights.stats()
+            for flights in (
+                meal_plan_mirror.flights, recipe_index.flights, recipe_flights, image_flights, variant_flights
+            )
+        },
     )
-    if add_resp.ok:
-        return jsonify(success=True), 201
+
+@app.context_processor
+def _inject_stale_flag():
+    return {"stale_data": data_is_stale()}
+
+# --- Metrics ------------------------------------------------------------------
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _remember_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def _observe_request(exc):
+    # Runs after a streamed body has been sent, so streamed pages are timed in full
+    started = g.pop("request_started", None)
+    if started is None:
+        return
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    status = 500 if exc is not None else g.pop("response_status", 500)
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route, status)
+
+def _cache_samples(*keys):
+    """Collector reading the first of ``keys`` present in each cache's stats()."""
+    caches = {"recipes": recipe_cache, "images": image_cache}
+    def collect():
+        samples = []
+        for name, cache in caches.items():
+            stats = cache.stats()
+            value = next((stats[key] for key in keys if key in stats), None)
+            samples.append(({"cache": name}, value))
+        return samples
+    return collect
+
+metrics.register_collector("mealplanner_cache_hits_total", "Cache lookups that found an entry.", "counter", _cache_samples("hits"))
+metrics.register_collector("mealplanner_cache_misses_total", "Cache lookups that found nothing.", "counter", _cache_samples("misses"))
+metrics.register_collector("mealplanner_cache_hit_ratio", "Hits divided by lookups since start.", "gauge", _cache_samples("hit_ratio"))
+metrics.register_collector("mealplanner_cache_entries", "Entries currently cached.", "gauge", _cache_samples("size", "files"))
+
+def _circuit_samples():
+    if mealie.breaker is None:
+        return []
+    return [({"upstream": "mealie"}, 0 if mealie.breaker.state == "closed" else 1)]
+
+def _coalesced_samples():
+    return [
+        ({"resource": flights.name}, flights.coalesced)
+        for flights in (
+            meal_plan_mirror.flights, recipe_index.flights, recipe_flights, image_flights, variant_flights
+        )
+    ]
+
+metrics.register_collector("mealplanner_circuit_open", "1 while calls to the upstream fail fast.", "gauge", _circuit_samples)
+metrics.register_collector(
+    "mealplanner_coalesced_requests_total",
+    "Upstream fetches avoided by joining an identical request already in flight.",
+    "counter", _coalesced_samples,
+)
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+def _send_cached_image(entry, immutable=False):
+    """Serve a cached image file straight from disk, answering 304 when possible."""
+    if request.if_none_match.contains_raw(entry.etag):
+        resp = Response(status=304)
     else:
-        return jsonify(success=False, message=add_resp.text), add_resp.status_code
+        resp = send_file(entry.path, mimetype=entry.content_type, etag=False, conditional=False)
+    if immutable:
+        # The URL names this exact version of the image
+        resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        # Let the browser keep it for a day; the ETag makes revalidation cheap
+        resp.headers["Cache-Control"] = "public, max-age=86400"
+    resp.headers["ETag"] = entry.etag
+    return resp
+
+
+def _refresh_image(recipe_id, entry=None):
+    """
+    Download ``recipe_id``'s image into the image cache, or revalidate
+    ``entry`` with its ETag. Concurrent calls for the same image share one
+    download.
+
+    Raises:
+        MealieError: If the image cannot be fetched
+    """
+    return image_flights.do(recipe_id, lambda: _download_image(recipe_id, entry))
+
+
+def _download_image(recipe_id, entry):
+    # Fetch (or revalidate) from the INTERNAL Mealie base through the pooled client
+    upstream = mealie.get_recipe_image(recipe_id, etag=entry.etag if entry else None)
+    try:
+        if upstream.status_code == 304 and entry is not None:
+            image_cache.mark_validated(recipe_id)
+            return entry
+        return image_cache.store(
+            recipe_id,
+            upstream.headers.get("ETag"),
+            upstream.headers.get("Content-Type", "image/webp"),
+            upstream.iter_content(chunk_size=8192),
+        )
+    finally:
+        # Return the connection to the pool
+        upstream.close()
+
+
+def cached_recipe_image(recipe_id):
+    """
+    Return the image cache entry for ``recipe_id``, downloading it from
+    Mealie when missing. A stale copy is returned at once and revalidated in
+    the background.
+
+    Raises:
+        MealieError: If there is no cached copy and the download fails
+    """
+    entry = image_cache.lookup(recipe_id)
+    if entry is None:
+        return _refresh_image(recipe_id)
+    if not entry.is_fresh(image_cache.ttl):
+        refresher.submit(("image", recipe_id), lambda: _refresh_image(recipe_id, entry))
+    return entry
+
+
+def cached_image_variant(recipe_id, source, variant):
+    """
+    Return the image cache entry for a resized ``variant`` of ``source``,
+    rendering it on first use. The source entry is returned when it is
+    already narrower than the variant or cannot be decoded; that outcome is
+    remembered per source ETag, so the source is only decoded once. It is
+    also returned, but not remembered, when reading the source fails.
+
+    Raises:
+        FileNotFoundError: If the source file was evicted meanwhile
+    """
+    width = image_variants.VARIANTS[variant]
+    key = image_variants.variant_key(recipe_id, variant)
+    etag = image_variants.variant_etag(source.etag, width)
+    if passthrough_variants.get(key) == etag:
+        return source
+    entry = image_cache.lookup(key)
+    if entry is not None and entry.etag == etag:
+        return entry
+
+    def render():
+        data = image_variants.resize(source.path, width)
+        if data is None:
+            passthrough_variants[key] = etag
+            return source
+        passthrough_variants.pop(key, None)
+        return image_cache.store(key, etag, "image/webp", [data])
+
+    try:
+        return variant_flights.do((key, etag), render)
+    except FileNotFoundError:
+        raise
+    except OSError as e:
+        logger.warning(f"Could not render {key}, serving the original: {e}")
+        return source
+
 
 @app.route("/img/recipe/<recipe_id>")
 def proxy_recipe_image(recipe_id: str):
-    # Use the INTERNAL base to fetch the image quickly
-    # Same path Mealie uses for public media, just on the internal host
-    internal_url = f"{config.MEALIE_API_URL}/api/media/recipes/{recipe_id}/images/min-original.webp"
+    variant = request.args.get("size")
+    if variant is not None and variant not in image_variants.VARIANTS:
+        abort(404)
+    try:
+        source = cached_recipe_image(recipe_id)
+        try:
+            return _send_image_variant(recipe_id, source, variant)
+        except FileNotFoundError:
+            # Another worker evicted or replaced the cached file meanwhile
+            source = _refresh_image(recipe_id)
+            return _send_image_variant(recipe_id, source, variant)
+    except MealieError as e:
+        abort(e.status_code or 502)
+
+
+def _send_image_variant(recipe_id, source, variant):
+    entry = cached_image_variant(recipe_id, source, variant) if variant else source
+    immutable = request.args.get("v") == image_variants.version(source.etag)
+    return _send_cached_image(entry, immutable=immutable)
+
+
+def warm_caches():
+    """
+    Sync the current meal plan window into the local mirror, refresh the
+    recipe index when it is due, and pre-fetch recipes and images for every
+    upcoming meal, so page loads are served locally.
+    """
+    start, end = plan_window()
+    try:
+        meal_plan_mirror.sync(start, end)
+    except MealieError as e:
+        logger.warning(f"Prefetch of meal plans failed: {e}")
+        return
+
+    if recipe_index.is_stale():
+        try:
+            recipe_index.sync()
+        except MealieError as e:
+            logger.warning(f"Prefetch of the recipe index failed: {e}")
+
+    upcoming = [row_to_item(row) for row in get_mirrored_meals(start, end, done=False)]
+    slugs = [item["recipe"]["slug"] for item in upcoming if item.get("recipe", {}).get("slug")]
+    _, failed = fetch_recipes(slugs)
+
+    recipe_ids = {item["recipe"]["id"] for item in upcoming if item.get("recipe", {}).get("id")}
+    for recipe_id in recipe_ids:
+        try:
+            source = cached_recipe_image(recipe_id)
+        except MealieError as e:
+            logger.warning(f"Prefetch of image {recipe_id} failed: {e}")
+            continue
+        for variant in image_variants.VARIANTS:
+            try:
+                cached_image_variant(recipe_id, source, variant)
+            except FileNotFoundError as e:
+                logger.warning(f"Prefetch of image {recipe_id} variants failed: {e}")
+                break
+
+    logger.info(
+        f"Prefetched {len(upcoming)} meals, {len(slugs) - len(failed)} recipes, "
+        f"{len(recipe_ids)} images"
+    )
 
-    headers = {"Authorization": f"Bearer {config.MEALIE_API_TOKEN}"}
 
-    try:
-        upstream = requests.get(internal_url, headers=headers, stream=True, timeout=10)
-    except requests.RequestException:
-        abort(502)
+# --- Profiling -----------------------------------------------------------------
 
-    if not upstream.ok:
-        abort(upstream.status_code)
+PROFILING_ENABLED = config.PROFILE_ALL_REQUESTS or bool(config.PROFILE_TOKEN)
 
-    def generate():
-        for chunk in upstream.iter_content(chunk_size=8192):
-            if chunk:
-                yield chunk
+def _require_profile_admin():
+    """404 unless profiling is on; 403 without the admin token once one is set."""
+    if not PROFILING_ENABLED:
+        abort(404)
+    supplied = request.headers.get("X-Profile") or request.args.get("profile")
+    if config.PROFILE_TOKEN and not profiling.token_matches(supplied, config.PROFILE_TOKEN):
+        abort(403)
+    return supplied
 
-    resp = Response(
-        stream_with_context(generate()),
-        status=upstream.status_code,
-        content_type=upstream.headers.get("Content-Type", "image/webp"),
+@app.route("/profiles")
+def profiles():
+    token = _require_profile_admin()
+    return render_template(
+        "profiles.html",
+        profiles=profiling.list_profiles(config.PROFILE_DIR),
+        token=token if config.PROFILE_TOKEN else None,
+        current_page="profiles",
     )
-    # Basic caching so the browser doesn’t re-download on every visit
-    resp.headers["Cache-Control"] = "public, max-age=86400"
-    etag = upstream.headers.get("ETag")
-    if etag:
-        resp.headers["ETag"] = etag
-    return resp
+
+@app.route("/profiles/<name>")
+def profile_detail(name):
+    _require_profile_admin()
+    path = profiling.profile_path(config.PROFILE_DIR, name)
+    if path is None:
+        abort(404)
+    if request.args.get("download"):
+        return send_file(path, mimetype="application/octet-stream", as_attachment=True, download_name=name)
+    sort = request.args.get("sort", "cumulative")
+    if sort not in ("cumulative", "tottime", "calls"):
+        sort = "cumulative"
+    return Response(profiling.profile_summary(path, sort=sort), mimetype="text/plain")
+
+if PROFILING_ENABLED:
+    app.wsgi_app = profiling.ProfilerMiddleware(
+        app.wsgi_app,
+        app.url_map,
+        config.PROFILE_DIR,
+        keep=config.PROFILE_KEEP,
+        token=config.PROFILE_TOKEN,
+        always=config.PROFILE_ALL_REQUESTS,
+    )
+
+
+prefetcher = Prefetcher(warm_caches, interval=config.PREFETCH_INTERVAL, jitter=config.PREFETCH_JITTER)
+done_pruner = Prefetcher(
+    lambda: prune_done_meals(config.DONE_RETENTION_DAYS, *plan_window()),
+    interval=config.DONE_PRUNE_INTERVAL,
+    jitter=config.DONE_PRUNE_INTERVAL / 10,
+    name="done-pruner",
+)
+og_job_pruner = Prefetcher(
+    prune_og_sync_jobs,
+    interval=config.OG_SYNC_PRUNE_INTERVAL,
+    jitter=config.OG_SYNC_PRUNE_INTERVAL / 10,
+    name="og-job-pruner",
+)
+
+og_sync.worker.start()
+prefetcher.start()
+done_pruner.start()
+og_job_pruner.start()
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    # Development server only; production runs under gunicorn (see wsgi.py)
+    app.run(host="0.0.0.0", port=5000, debug=config.DEBUG)
\ No newline at end of file
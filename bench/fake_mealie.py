@@ -0,0 +1,199 @@
+"""
+In-process fake of the Mealie API for benchmarks.
+
+Serves meal plans, recipes and recipe images with configurable latency and
+sizes, honours ``If-None-Match`` like Mealie does, and counts every upstream
+call so a benchmark can report how many requests each route caused.
+"""
+import io
+import json
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+
+class FakeMealie:
+    """
+    Args:
+        latency: Seconds added to every request
+        meals: Number of meal plan entries, one per day centred on today
+        ingredients: Ingredients per recipe
+        image_width: Width in pixels of the recipe image, a noisy WebP
+    """
+
+    def __init__(self, latency: float = 0.05, meals: int = 14, ingredients: int = 10,
+                 image_width: int = 1200, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.meals = meals
+        self.ingredients = ingredients
+        self.image = self._render_image(image_width)
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._next_id = 10_000
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _render_image(width: int) -> bytes:
+        # Noise keeps the file photo-sized and gives the resizer real work
+        height = max(1, width * 3 // 4)
+        image = Image.merge("RGB", [Image.effect_noise((width, height), 64) for _ in range(3)])
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=80)
+        return out.getvalue()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeMealie":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-mealie", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.counts)
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    # --- Fixtures ---------------------------------------------------------
+
+    def meal_items(self):
+        start = date.today() - timedelta(days=self.meals // 2)
+        return [
+            {
+                "id": i + 1,
+                "date": (start + timedelta(days=i)).isoformat(),
+                "entryType": "dinner",
+                "recipeId": f"recipe-{i}",
+                "recipe": {
+                    "id": f"recipe-{i}",
+                    "slug": f"recipe-{i}",
+                    "name": f"Recipe {i}",
+                    "description": "Benchmark recipe",
+                    "prepTime": "10 minutes",
+                    "performTime": "20 minutes",
+                    "dateUpdated": "2024-01-01T00:00:00",
+                },
+            }
+            for i in range(self.meals)
+        ]
+
+    def recipe(self, slug: str):
+        return {
+            "id": slug,
+            "slug": slug,
+            "name": slug.replace("-", " ").title(),
+            "recipeIngredient": [
+                {"referenceId": f"{slug}-ingredient-{j}", "display": f"{j + 1} cup ingredient {j}"}
+                for j in range(self.ingredients)
+            ],
+        }
+
+    # --- HTTP -------------------------------------------------------------
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="application/json", headers=None):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def _conditional(self, etag, body, content_type="application/json"):
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, headers={"ETag": etag})
+                else:
+                    self._send(200, body, content_type, {"ETag": etag})
+
+            def _read_body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                query = parse_qs(urlparse(self.path).query)
+                time.sleep(fake.latency)
+
+                if path == "/api/households/mealplans":
+                    fake.count("GET /api/households/mealplans")
+                    items = fake.meal_items()
+                    if "start_date" in query:
+                        lo, hi = query["start_date"][0], query.get("end_date", ["9999"])[0]
+                        items = [item for item in items if lo <= item["date"] <= hi]
+                    page = int(query.get("page", ["1"])[0])
+                    per_page = int(query.get("perPage", ["50"])[0])
+                    if per_page <= 0:
+                        per_page = max(1, len(items))
+                    total_pages = max(1, -(-len(items) // per_page))
+                    return self._send(200, {
+                        "page": page,
+                        "per_page": per_page,
+                        "total": len(items),
+                        "total_pages": total_pages,
+                        "items": items[(page - 1) * per_page: page * per_page],
+                    })
+
+                if path == "/api/recipes":
+                    fake.count("GET /api/recipes")
+                    items = [{"id": f"recipe-{i}", "slug": f"recipe-{i}", "name": f"Recipe {i}"}
+                             for i in range(fake.meals)]
+                    return self._send(200, {"page": 1, "per_page": len(items), "total": len(items),
+                                            "total_pages": 1, "items": items})
+
+                if path.startswith("/api/recipes/"):
+                    fake.count("GET /api/recipes/{slug}")
+                    slug = path.rsplit("/", 1)[1]
+                    return self._conditional(f'"{slug}-v1"', fake.recipe(slug))
+
+                if path.startswith("/api/media/recipes/"):
+                    fake.count("GET /api/media/recipes/{id}/images")
+                    recipe_id = path.split("/")[4]
+                    return self._conditional(f'"image-{recipe_id}"', fake.image, "image/webp")
+
+                fake.count(f"GET {path} (404)")
+                self._send(404, {"detail": "Not found"})
+
+            def do_POST(self):
+                self._read_body()
+                time.sleep(fake.latency)
+                path = urlparse(self.path).path
+                fake.count(f"POST {path}")
+                with fake._lock:
+                    fake._next_id += 1
+                    new_id = fake._next_id
+                self._send(201, {"id": new_id})
+
+            def do_DELETE(self):
+                time.sleep(fake.latency)
+                fake.count("DELETE /api/households/mealplans/{id}")
+                self._send(200, {})
+
+        return Handler
@@ -0,0 +1,34 @@
+"""
+Fake OurGroceries client for benchmarks.
+
+Replaces ``ourgroceries_helper.send_items_to_og_sync`` so the sync queue
+runs end to end without talking to the real service.
+"""
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class FakeOurGroceries:
+    """Accepts every sync after ``latency`` seconds and counts calls and items."""
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.calls = 0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def send_items_to_og_sync(self, list_name: str, items: List[str]) -> Tuple[bool, Optional[str]]:
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            self.items += len(items)
+        return True, None
+
+    def install(self) -> None:
+        import ourgroceries_helper
+        ourgroceries_helper.send_items_to_og_sync = self.send_items_to_og_sync
+
+    def snapshot(self):
+        with self._lock:
+            return {"calls": self.calls, "items": self.items}
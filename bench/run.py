@@ -0,0 +1,262 @@
+"""
+Load benchmark for the planner's main routes.
+
+Starts a fake Mealie server and a fake OurGroceries client, serves the Flask
+app on a local port from a throwaway working directory, drives each route
+with concurrent clients and prints one JSON report with latency percentiles,
+throughput and the upstream calls each route caused.
+
+    python bench/run.py --concurrency 8 --requests 200 --latency 0.05 > before.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_mealie import FakeMealie  # noqa: E402
+from fake_ourgroceries import FakeOurGroceries  # noqa: E402
+
+ROUTES = ["index", "done", "shopping-list", "image", "image-variant", "add-og", "api-meals"]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "max_ms": ms(ordered[-1]) if ordered else None,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+    }
+
+
+def counter_delta(before, after):
+    return {key: after[key] - before.get(key, 0) for key in sorted(after) if after[key] != before.get(key, 0)}
+
+
+class Bench:
+    def __init__(self, args, base_url, fake_mealie, fake_og):
+        self.args = args
+        self.base_url = base_url
+        self.mealie = fake_mealie
+        self.og = fake_og
+        self._local = threading.local()
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    def session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def next_n(self):
+        with self._counter_lock:
+            self._counter += 1
+            return self._counter
+
+    def request(self, route):
+        """Issue one request for ``route`` and return True on an expected status."""
+        s = self.session()
+        n = self.next_n()
+        if route == "index":
+            r = s.get(f"{self.base_url}/")
+        elif route == "done":
+            r = s.get(f"{self.base_url}/done")
+        elif route == "shopping-list":
+            r = s.get(f"{self.base_url}/shopping-list")
+        elif route == "image":
+            r = s.get(f"{self.base_url}/img/recipe/recipe-{n % self.args.meals}")
+        elif route == "image-variant":
+            size = ("thumb", "card", "full")[n % 3]
+            r = s.get(f"{self.base_url}/img/recipe/recipe-{n % self.args.meals}", params={"size": size})
+        elif route == "api-meals":
+            r = s.get(f"{self.base_url}/api/meals")
+        elif route == "add-og":
+            # A fresh ingredient per request, so every call queues a sync
+            payload = {"ingredients": [{"id": f"bench-{n}", "name": f"Bench item {n}"}]}
+            r = s.post(f"{self.base_url}/shopping-list/add-og", json=payload)
+        else:
+            raise ValueError(f"Unknown route {route}")
+        r.content  # read streamed bodies completely
+        return r.status_code < 400
+
+    def run_route(self, route):
+        for _ in range(self.args.warmup):
+            self.request(route)
+
+        mealie_before = self.mealie.snapshot()
+        latencies, errors = [], 0
+        lock = threading.Lock()
+
+        def one(_):
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                ok = self.request(route)
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors += 1
+
+        og_before = self.og.snapshot()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as pool:
+            list(pool.map(one, range(self.args.requests)))
+        elapsed = time.perf_counter() - started
+
+        result = summarize(latencies, errors, elapsed)
+        result["upstream_calls"] = counter_delta(mealie_before, self.mealie.snapshot())
+        if route == "add-og":
+            result["og_queue_drain_s"] = wait_for_og_queue(self.args.drain_timeout)
+            og_after = self.og.snapshot()
+            result["og_calls"] = og_after["calls"] - og_before["calls"]
+            result["og_items"] = og_after["items"] - og_before["items"]
+        return result
+
+
+def wait_for_og_queue(timeout):
+    """Seconds until no sync job is pending or running, or None on timeout."""
+    import db
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        with db.get_connection() as conn:
+            (active,) = conn.execute(
+                "SELECT COUNT(*) FROM og_sync_jobs WHERE status IN ('pending', 'running')"
+            ).fetchone()
+        if not active:
+            return round(time.perf_counter() - started, 3)
+        time.sleep(0.05)
+    return None
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", default=",".join(ROUTES), help=f"comma-separated subset of {ROUTES}")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per route (0 = cold caches)")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Mealie latency per request, seconds")
+    parser.add_argument("--meals", type=int, default=14, help="meal plan entries served by the fake Mealie")
+    parser.add_argument("--ingredients", type=int, default=10, help="ingredients per recipe")
+    parser.add_argument("--image-width", type=int, default=1200, help="recipe image width in pixels")
+    parser.add_argument("--og-latency", type=float, default=0.2, help="fake OurGroceries latency per sync, seconds")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="seconds to wait for the OG queue to drain")
+    parser.add_argument("--prefetch", action="store_true", help="keep the background prefetcher running")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        raise SystemExit(f"Unknown routes: {', '.join(sorted(unknown))}")
+
+    fake_mealie = FakeMealie(
+        latency=args.latency, meals=args.meals, ingredients=args.ingredients,
+        image_width=args.image_width,
+    ).start()
+    fake_og = FakeOurGroceries(latency=args.og_latency)
+
+    # Run the app somewhere disposable. config loads .env with override=True,
+    # so the paths are set on config after importing it (and before db and
+    # app read them), in case .env points them at the real database.
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix="mealie-bench-")
+    os.chdir(workdir)
+
+    import config
+    paths = {
+        "DB_PATH": os.path.join(workdir, "planner.db"),
+        "IMAGE_CACHE_DIR": os.path.join(workdir, "image_cache"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+    }
+    for name, path in paths.items():
+        os.environ[name] = path
+        setattr(config, name, path)
+    config.MEALIE_API_URL = fake_mealie.url
+    config.MEALIE_URL = fake_mealie.url
+    config.MEALIE_API_TOKEN = "bench"
+    if not args.prefetch:
+        config.PREFETCH_INTERVAL = 0
+    fake_og.install()
+
+    from werkzeug.serving import make_server
+    import app as planner
+    import db
+    import db_setup
+
+    for path in (db.DB_PATH, db_setup.DB_PATH, planner.image_cache.directory, config.PROFILE_DIR):
+        assert os.path.abspath(path).startswith(workdir + os.sep), f"bench would write outside {workdir}: {path}"
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, planner.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-server", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    bench = Bench(args, base_url, fake_mealie, fake_og)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "params": {key: value for key, value in vars(args).items() if key != "output"},
+        "routes": {},
+    }
+    try:
+        for route in routes:
+            print(f"benchmarking {route} ...", file=sys.stderr)
+            report["routes"][route] = bench.run_route(route)
+        report["cache_stats"] = requests.get(f"{base_url}/cache-stats").json()
+    finally:
+        server.shutdown()
+        fake_mealie.stop()
+
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
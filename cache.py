@@ -0,0 +1,124 @@
+"""
+Small in-process caching primitives shared by the Meal Planner application.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheEntry:
+    """A cached value together with the metadata needed to revalidate it."""
+    value: Any
+    stored_at: float = field(default_factory=time.monotonic)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    def is_fresh(self, ttl: float) -> bool:
+        return self.age() < ttl
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after ``ttl`` seconds.
+
+    Expired entries are not dropped on read: ``peek()`` still returns them so
+    callers can revalidate against the upstream (e.g. with ``If-None-Match``)
+    instead of downloading the full payload again.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """
+        Return the entry for ``key`` whether fresh or stale, and record a hit
+        (fresh) or miss (absent or stale).
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if entry.is_fresh(self.ttl):
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for ``key`` if present and fresh, else None."""
+        entry = self.peek(key)
+        if entry is None or not entry.is_fresh(self.ttl):
+            return None
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> CacheEntry:
+        """Store ``value`` under ``key``, evicting the least recently used entry if full."""
+        entry = CacheEntry(value, etag=etag, last_modified=last_modified)
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def touch(self, key: Hashable) -> Optional[CacheEntry]:
+        """Mark a stale entry as fresh again after a successful revalidation (304)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                entry.stored_at = time.monotonic()
+                self._data.move_to_end(key)
+                self.revalidations += 1
+            return entry
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class RecipeCache(TTLCache):
+    """TTLCache for full recipe documents keyed by slug."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600):
+        super().__init__(maxsize=maxsize, ttl=ttl)
@@ -11,10 +11,30 @@ MEALIE_API_TOKEN = os.getenv("MEALIE_API_TOKEN")
 OG_USERNAME = os.getenv("OG_USERNAME")
 OG_PASSWORD = os.getenv("OG_PASSWORD")
 OG_LIST_NAME = os.getenv("OG_LIST_NAME", "Meal Planner")
+DEBUG = os.getenv("FLASK_DEBUG", "0").lower() in ("1", "true", "yes")
+OG_TIMEOUT = float(os.getenv("OG_TIMEOUT", 30))
+OG_SYNC_MAX_ATTEMPTS = int(os.getenv("OG_SYNC_MAX_ATTEMPTS", 8))
+OG_SYNC_BACKOFF_BASE = float(os.getenv("OG_SYNC_BACKOFF_BASE", 5))
+OG_SYNC_BACKOFF_MAX = float(os.getenv("OG_SYNC_BACKOFF_MAX", 600))
+# Seconds between deletions of old finished sync jobs (0 disables it)
+OG_SYNC_PRUNE_INTERVAL = float(os.getenv("OG_SYNC_PRUNE_INTERVAL", 3600))
+
+# SQLite database. WAL mode keeps -wal and -shm files beside it, so mount
+# the whole directory, not just the file, when running in a container.
+DB_PATH = os.getenv("DB_PATH", "planner.db")
 
 # Load days from config.json
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
 
+
+def _config_stamp():
+    try:
+        st = os.stat(CONFIG_PATH)
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return None
+
+
 try:
     with open(CONFIG_PATH) as f:
         json_config  = json.load(f)
@@ -25,3 +45,91 @@ except FileNotFoundError:
 
 DAYS_BEFORE = int(json_config.get("DAYS_BEFORE", 0))
 DAYS_AFTER = int(json_config.get("DAYS_AFTER", 0))
+_json_config_stamp = _config_stamp()
+
+
+def reload_json_config():
+    """
+    Re-read the days window from config.json if the file changed since it was
+    last read, so a change saved through /settings by one worker process
+    reaches every other worker on its next request.
+    """
+    global json_config, DAYS_BEFORE, DAYS_AFTER, _json_config_stamp
+    stamp = _config_stamp()
+    if stamp == _json_config_stamp:
+        return
+    try:
+        with open(CONFIG_PATH) as f:
+            loaded = json.load(f)
+    except FileNotFoundError:
+        loaded = {}
+    except ValueError:
+        # Caught mid-write; keep the current values and try again next time
+        return
+    json_config = loaded
+    DAYS_BEFORE = int(json_config.get("DAYS_BEFORE", 0))
+    DAYS_AFTER = int(json_config.get("DAYS_AFTER", 0))
+    _json_config_stamp = stamp
+
+# Concurrent recipe fetching for the shopping list
+RECIPE_FETCH_WORKERS = int(os.getenv("RECIPE_FETCH_WORKERS", 8))
+RECIPE_FETCH_TIMEOUT = float(os.getenv("RECIPE_FETCH_TIMEOUT", 10))
+# Stream each recipe section of the shopping list as soon as it is fetched
+SHOPPING_LIST_STREAM = os.getenv("SHOPPING_LIST_STREAM", "1").lower() in ("1", "true", "yes")
+
+# Recipe detail cache
+RECIPE_CACHE_TTL = float(os.getenv("RECIPE_CACHE_TTL", 600))
+RECIPE_CACHE_SIZE = int(os.getenv("RECIPE_CACHE_SIZE", 256))
+
+# Local meal plan mirror: a request syncs its window inline only when the
+# last sync covering it is older than this (the prefetcher keeps it fresh)
+MEAL_PLAN_MIRROR_MAX_AGE = float(os.getenv("MEAL_PLAN_MIRROR_MAX_AGE", 300))
+# Meal plan entries per Mealie page, and pages fetched in parallel
+MEAL_PLAN_PAGE_SIZE = int(os.getenv("MEAL_PLAN_PAGE_SIZE", 100))
+MEAL_PLAN_PAGE_WORKERS = int(os.getenv("MEAL_PLAN_PAGE_WORKERS", 4))
+
+# Slug -> recipe id index used when adding recipes to the meal plan,
+# refreshed from Mealie's recipe listing once it is older than RECIPE_INDEX_MAX_AGE seconds
+RECIPE_INDEX_MAX_AGE = float(os.getenv("RECIPE_INDEX_MAX_AGE", 3600))
+RECIPE_INDEX_PAGE_SIZE = int(os.getenv("RECIPE_INDEX_PAGE_SIZE", 200))
+
+# Done meals shown per page on /done
+DONE_PAGE_SIZE = int(os.getenv("DONE_PAGE_SIZE", 24))
+
+# Done meals marked longer ago than this are pruned (0 keeps them forever),
+# checked every DONE_PRUNE_INTERVAL seconds (0 disables pruning)
+DONE_RETENTION_DAYS = int(os.getenv("DONE_RETENTION_DAYS", 365))
+DONE_PRUNE_INTERVAL = float(os.getenv("DONE_PRUNE_INTERVAL", 3600))
+
+# Shared Mealie HTTP client
+MEALIE_POOL_SIZE = int(os.getenv("MEALIE_POOL_SIZE", 16))
+MEALIE_CONNECT_TIMEOUT = float(os.getenv("MEALIE_CONNECT_TIMEOUT", 3.05))
+MEALIE_READ_TIMEOUT = float(os.getenv("MEALIE_READ_TIMEOUT", 10))
+MEALIE_RETRIES = int(os.getenv("MEALIE_RETRIES", 2))
+MEALIE_BULK_WORKERS = int(os.getenv("MEALIE_BULK_WORKERS", 8))
+
+# Circuit breaker: after MEALIE_BREAKER_THRESHOLD consecutive failures (0
+# disables it) Mealie calls fail fast for MEALIE_BREAKER_RESET seconds, and
+# pages are served from local data. Stale data is refreshed in the background,
+# retried every REFRESH_RETRY_DELAY seconds (doubling) up to REFRESH_MAX_ATTEMPTS times.
+MEALIE_BREAKER_THRESHOLD = int(os.getenv("MEALIE_BREAKER_THRESHOLD", 5))
+MEALIE_BREAKER_RESET = float(os.getenv("MEALIE_BREAKER_RESET", 30))
+REFRESH_RETRY_DELAY = float(os.getenv("REFRESH_RETRY_DELAY", 5))
+REFRESH_MAX_ATTEMPTS = int(os.getenv("REFRESH_MAX_ATTEMPTS", 5))
+
+# On-disk recipe image cache
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "image_cache")
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", 200))
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", 86400))
+
+# Background cache prefetcher (0 disables it)
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", 45))
+PREFETCH_JITTER = float(os.getenv("PREFETCH_JITTER", 10))
+
+# Request profiling: PROFILE_ALL_REQUESTS profiles everything; with
+# PROFILE_TOKEN set, a request carrying "X-Profile: <token>" or
+# "?profile=<token>" is profiled on demand. Both off = no overhead.
+PROFILE_ALL_REQUESTS = os.getenv("PROFILE_ALL_REQUESTS", "0").lower() in ("1", "true", "yes")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))
@@ -1,13 +1,57 @@
+import functools
+import os
 import sqlite3
-from datetime import datetime, UTC
-from typing import List, Tuple, Optional, Union
+import threading
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple, Optional, Union
 from logging_config import get_logger
+import config
+import metrics
 
-DB_PATH = "planner.db"
-SCHEMA_VERSION = 2  # Increment when schema changes
+DB_PATH = config.DB_PATH
+SCHEMA_VERSION = 8  # Increment when schema changes
+
+# Connection tuning
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 8192
 
 logger = get_logger(__name__)
 
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    """Open a new connection with WAL journaling and tuned pragmas."""
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return this thread's database connection, opening it on first use.
+
+    Connections are never shared between threads, and a connection inherited
+    across ``fork()`` is discarded so each worker process opens its own.
+    Use it as ``with get_connection() as conn:`` to commit or roll back.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.pid != os.getpid():
+        conn = _connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+def _timed(func):
+    """Record the duration of a database function in the SQLite metrics histogram."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with metrics.SQLITE_SECONDS.time(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
 def init_db():
     """Initialize the database with proper schema versioning and migrations."""
     from db_setup import setup_database
@@ -16,12 +60,14 @@ def init_db():
         raise RuntimeError("Database setup failed")
     logger.info("Database initialization completed successfully")
 
-def mark_done(meal_id: Union[int, str]) -> bool:
+@_timed
+def mark_done(meal_id: Union[int, str], meal_date: Optional[str] = None) -> bool:
     """
     Mark a meal as done.
     
     Args:
         meal_id: The ID of the meal to mark as done
+        meal_date: The date the meal was planned for (YYYY-MM-DD), if known
         
     Returns:
         bool: True if the meal was marked as done, False if it was already done
@@ -34,20 +80,23 @@ def mark_done(meal_id: Union[int, str]) -> bool:
         raise ValueError("meal_id cannot be None")
     
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Check if already done
-            cursor.execute("SELECT 1 FROM done_meals WHERE meal_id = ?", (meal_id,))
-            if cursor.fetchone():
-                logger.info(f"Meal {meal_id} is already marked as done")
-                return False
-            
             cursor.execute(
-                "INSERT INTO done_meals (meal_id, done_at) VALUES (?, ?)",
-                (meal_id, datetime.now(UTC).isoformat())
+                "INSERT OR IGNORE INTO done_meals (meal_id, done_at, meal_date) VALUES (?, ?, ?)",
+                (meal_id, datetime.now(UTC).isoformat(), meal_date)
             )
+            inserted = cursor.rowcount > 0
+            if not inserted and meal_date:
+                cursor.execute(
+                    "UPDATE done_meals SET meal_date = ? WHERE meal_id = ? AND meal_date IS NULL",
+                    (meal_date, meal_id)
+                )
             conn.commit()
+
+            if not inserted:
+                logger.info(f"Meal {meal_id} is already marked as done")
+                return False
             logger.info(f"Marked meal {meal_id} as done")
             return True
             
@@ -55,6 +104,7 @@ def mark_done(meal_id: Union[int, str]) -> bool:
         logger.error(f"Failed to mark meal {meal_id} as done: {e}")
         raise
 
+@_timed
 def is_done(meal_id: Union[int, str]) -> bool:
     """
     Check if a meal is marked as done.
@@ -73,35 +123,34 @@ def is_done(meal_id: Union[int, str]) -> bool:
         raise ValueError("meal_id cannot be None")
     
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT 1 FROM done_meals WHERE meal_id = ?", (meal_id,))
             return cursor.fetchone() is not None
-            
+        
     except sqlite3.Error as e:
         logger.error(f"Failed to check if meal {meal_id} is done: {e}")
         raise
 
-def get_all_done_ids() -> List[Union[int, str]]:
+@_timed
+def get_done_ids() -> FrozenSet[Union[int, str]]:
     """
-    Get all meal IDs that are marked as done.
+    Get the set of meal IDs that are marked as done.
     
     Returns:
-        List[Union[int, str]]: List of meal IDs that are marked as done
+        FrozenSet[Union[int, str]]: Meal IDs that are marked as done
         
     Raises:
         sqlite3.Error: If database operation fails
     """
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT meal_id FROM done_meals ORDER BY done_at DESC")
-            return [row[0] for row in cursor.fetchall()]
-            
+        with get_connection() as conn:
+            return frozenset(row[0] for row in conn.execute("SELECT meal_id FROM done_meals"))
     except sqlite3.Error as e:
-        logger.error(f"Failed to get all done meal IDs: {e}")
+        logger.error(f"Failed to load done meal IDs: {e}")
         raise
 
+@_timed
 def re_add(meal_id: Union[int, str]) -> bool:
     """
     Remove a meal from the done list (re-add it to the meal planner).
@@ -120,7 +169,7 @@ def re_add(meal_id: Union[int, str]) -> bool:
         raise ValueError("meal_id cannot be None")
     
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM done_meals WHERE meal_id = ?", (meal_id,))
             rows_affected = cursor.rowcount
@@ -137,6 +186,499 @@ def re_add(meal_id: Union[int, str]) -> bool:
         logger.error(f"Failed to re-add meal {meal_id}: {e}")
         raise
 
+def _validate_meal_ids(meal_ids: List[Union[int, str]]) -> List[Union[int, str]]:
+    if meal_ids is None:
+        raise ValueError("meal_ids cannot be None")
+    if not isinstance(meal_ids, list):
+        raise ValueError("meal_ids must be a list")
+    for i, meal_id in enumerate(meal_ids):
+        if meal_id is None:
+            raise ValueError(f"meal_id at index {i} cannot be None")
+    # Drop duplicates, keeping the caller's order
+    return list(dict.fromkeys(meal_ids))
+
+def _select_done(cursor: sqlite3.Cursor, meal_ids: List[Union[int, str]]) -> set:
+    placeholders = ",".join("?" * len(meal_ids))
+    cursor.execute(f"SELECT meal_id FROM done_meals WHERE meal_id IN ({placeholders})", meal_ids)
+    return {row[0] for row in cursor.fetchall()}
+
+@_timed
+def mark_done_many(
+    meal_ids: List[Union[int, str]],
+    meal_dates: Optional[Dict[Union[int, str], str]] = None,
+) -> Dict[Union[int, str], bool]:
+    """
+    Mark several meals as done in a single transaction.
+    
+    Args:
+        meal_ids: The IDs of the meals to mark as done
+        meal_dates: Optional planned date (YYYY-MM-DD) per meal ID
+        
+    Returns:
+        Dict[Union[int, str], bool]: For each meal ID, True if it was marked as
+        done, False if it was already done
+        
+    Raises:
+        ValueError: If meal_ids is invalid
+        sqlite3.Error: If database operation fails
+    """
+    meal_ids = _validate_meal_ids(meal_ids)
+    if not meal_ids:
+        return {}
+    
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            already_done = _select_done(cursor, meal_ids)
+            done_at = datetime.now(UTC).isoformat()
+            meal_dates = meal_dates or {}
+            cursor.executemany(
+                "INSERT OR IGNORE INTO done_meals (meal_id, done_at, meal_date) VALUES (?, ?, ?)",
+                [(meal_id, done_at, meal_dates.get(meal_id)) for meal_id in meal_ids]
+            )
+            conn.commit()
+            
+            results = {meal_id: meal_id not in already_done for meal_id in meal_ids}
+            logger.info(f"Marked {sum(results.values())} of {len(meal_ids)} meals as done")
+            return results
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to mark meals {meal_ids} as done: {e}")
+        raise
+
+@_timed
+def re_add_many(meal_ids: List[Union[int, str]]) -> Dict[Union[int, str], bool]:
+    """
+    Remove several meals from the done list in a single transaction.
+    
+    Args:
+        meal_ids: The IDs of the meals to re-add
+        
+    Returns:
+        Dict[Union[int, str], bool]: For each meal ID, True if it was removed
+        from the done list, False if it wasn't in the done list
+        
+    Raises:
+        ValueError: If meal_ids is invalid
+        sqlite3.Error: If database operation fails
+    """
+    meal_ids = _validate_meal_ids(meal_ids)
+    if not meal_ids:
+        return {}
+    
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            was_done = _select_done(cursor, meal_ids)
+            cursor.executemany(
+                "DELETE FROM done_meals WHERE meal_id = ?",
+                [(meal_id,) for meal_id in meal_ids]
+            )
+            conn.commit()
+            
+            results = {meal_id: meal_id in was_done for meal_id in meal_ids}
+            logger.info(f"Re-added {sum(results.values())} of {len(meal_ids)} meals to meal planner")
+            return results
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to re-add meals {meal_ids}: {e}")
+        raise
+
+@_timed
+def get_done_page(page: int = 1, per_page: int = 24) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Get one page of done meals, most recently planned first.
+    
+    Each row is joined with its mirrored meal plan entry. Meals whose date is
+    unknown are ordered by the day they were marked as done.
+    
+    Args:
+        page: 1-based page number
+        per_page: Number of done meals per page
+        
+    Returns:
+        Tuple[List[Dict[str, Any]], int]: The page's rows (meal_id, done_at,
+        meal_date and ``entry``, the mirrored entry or None) and the total
+        number of done meals
+        
+    Raises:
+        ValueError: If page or per_page is not positive
+        sqlite3.Error: If database operation fails
+    """
+    if page < 1 or per_page < 1:
+        raise ValueError("page and per_page must be positive")
+    
+    columns = ", ".join(f"m.{column}" for column in MEAL_PLAN_COLUMNS)
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM done_meals")
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f"SELECT d.meal_id, d.done_at, COALESCE(m.date, d.meal_date), {columns} "
+                "FROM done_meals d LEFT JOIN meal_plan_entries m ON m.id = d.meal_id "
+                "ORDER BY COALESCE(m.date, d.meal_date, substr(d.done_at, 1, 10)) DESC, "
+                "d.done_at DESC, d.meal_id DESC "
+                "LIMIT ? OFFSET ?",
+                (per_page, (page - 1) * per_page)
+            )
+            rows = []
+            for meal_id, done_at, meal_date, *entry in cursor.fetchall():
+                rows.append({
+                    "meal_id": meal_id,
+                    "done_at": done_at,
+                    "meal_date": meal_date,
+                    "entry": dict(zip(MEAL_PLAN_COLUMNS, entry)) if entry[0] is not None else None,
+                })
+            return rows, total
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to get done meals page {page}: {e}")
+        raise
+
+# Columns of meal_plan_entries, in the order rows are read and written
+MEAL_PLAN_COLUMNS = (
+    "id", "date", "entry_type", "title", "text",
+    "recipe_id", "recipe_slug", "recipe_name", "recipe_description",
+    "recipe_prep_time", "recipe_perform_time", "recipe_updated_at",
+    "updated_at", "fingerprint",
+)
+
+RECIPE_INDEX_COLUMNS = (
+    "slug", "id", "name", "description", "prep_time", "perform_time", "updated_at",
+)
+
+# Stored bounds of an open-ended sync window
+_MIN_DATE = ""
+_MAX_DATE = "9999-12-31"
+
+def _upsert_meal_plan_entries(cursor: sqlite3.Cursor, entries: List[Dict[str, Any]], synced_at: str) -> int:
+    """Insert or update entries, skipping those whose fingerprint is unchanged."""
+    columns = ", ".join(MEAL_PLAN_COLUMNS)
+    placeholders = ", ".join("?" * len(MEAL_PLAN_COLUMNS))
+    updates = ", ".join(f"{column} = excluded.{column}" for column in MEAL_PLAN_COLUMNS[1:])
+    cursor.executemany(
+        f"INSERT INTO meal_plan_entries ({columns}, synced_at) VALUES ({placeholders}, ?) "
+        f"ON CONFLICT(id) DO UPDATE SET {updates}, synced_at = excluded.synced_at "
+        "WHERE meal_plan_entries.fingerprint IS NOT excluded.fingerprint",
+        [tuple(entry[column] for column in MEAL_PLAN_COLUMNS) + (synced_at,) for entry in entries]
+    )
+    return max(cursor.rowcount, 0)
+
+@_timed
+def mirror_meal_plans(
+    entries: List[Dict[str, Any]],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    complete: bool = True,
+) -> Dict[str, int]:
+    """
+    Store a fresh upstream snapshot of the meal plan window in the local mirror.
+    
+    Unchanged entries are not rewritten. When ``complete`` is True, mirrored
+    entries in the window that are missing from ``entries`` were deleted
+    upstream and are removed, and the window is recorded as synced.
+    
+    Args:
+        entries: Meal plan rows keyed by MEAL_PLAN_COLUMNS
+        start_date: First day of the window (YYYY-MM-DD), or None for unbounded
+        end_date: Last day of the window (YYYY-MM-DD), or None for unbounded
+        complete: Whether ``entries`` is the whole window rather than a part of it
+        
+    Returns:
+        Dict[str, int]: Number of ``changed`` and ``deleted`` entries
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    start, end = start_date or _MIN_DATE, end_date or _MAX_DATE
+    synced_at = datetime.now(UTC).isoformat()
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            changed = _upsert_meal_plan_entries(cursor, entries, synced_at) if entries else 0
+            deleted = 0
+            if complete:
+                ids = {entry["id"] for entry in entries}
+                cursor.execute(
+                    "SELECT id FROM meal_plan_entries WHERE date >= ? AND date <= ?", (start, end)
+                )
+                stale = [row[0] for row in cursor.fetchall() if row[0] not in ids]
+                if stale:
+                    cursor.executemany("DELETE FROM meal_plan_entries WHERE id = ?", [(i,) for i in stale])
+                    deleted = len(stale)
+                cursor.execute(
+                    "INSERT OR REPLACE INTO meal_plan_sync_windows (start_date, end_date, synced_at) "
+                    "VALUES (?, ?, ?)",
+                    (start, end, synced_at)
+                )
+            conn.commit()
+            return {"changed": changed, "deleted": deleted}
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to mirror meal plans {start_date}..{end_date}: {e}")
+        raise
+
+@_timed
+def get_meal_plan_window_age(start_date: Optional[str], end_date: Optional[str]) -> Optional[float]:
+    """
+    Get how long ago the most recent sync covering ``[start_date, end_date]`` ran.
+    
+    Args:
+        start_date: First day of the window (YYYY-MM-DD), or None for unbounded
+        end_date: Last day of the window (YYYY-MM-DD), or None for unbounded
+        
+    Returns:
+        Optional[float]: Age in seconds, or None if no sync covers the window
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT MAX(synced_at) FROM meal_plan_sync_windows "
+                "WHERE start_date <= ? AND end_date >= ?",
+                (start_date or _MIN_DATE, end_date or _MAX_DATE)
+            )
+            (synced_at,) = cursor.fetchone()
+            if synced_at is None:
+                return None
+            return (datetime.now(UTC) - datetime.fromisoformat(synced_at)).total_seconds()
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to check meal plan sync window: {e}")
+        raise
+
+@_timed
+def get_mirrored_meals(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    done: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Get mirrored meal plan entries in a date window, joined with done_meals.
+    
+    Args:
+        start_date: First day (YYYY-MM-DD), or None for unbounded
+        end_date: Last day (YYYY-MM-DD), or None for unbounded
+        done: True for done meals only, False for meals not done, None for all
+        
+    Returns:
+        List[Dict[str, Any]]: Rows keyed by MEAL_PLAN_COLUMNS plus ``done_at``,
+        ordered by date
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    columns = ", ".join(f"m.{column}" for column in MEAL_PLAN_COLUMNS)
+    query = (
+        f"SELECT {columns}, d.done_at FROM meal_plan_entries m "
+        "LEFT JOIN done_meals d ON d.meal_id = m.id "
+        "WHERE m.date >= ? AND m.date <= ?"
+    )
+    if done is True:
+        query += " AND d.meal_id IS NOT NULL"
+    elif done is False:
+        query += " AND d.meal_id IS NULL"
+    query += " ORDER BY m.date, m.id"
+    
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (start_date or _MIN_DATE, end_date or _MAX_DATE))
+            return [dict(zip(MEAL_PLAN_COLUMNS + ("done_at",), row)) for row in cursor.fetchall()]
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to read mirrored meal plans: {e}")
+        raise
+
+@_timed
+def upsert_meal_plan_entries(entries: List[Dict[str, Any]]) -> int:
+    """
+    Insert or update individual entries in the mirror, e.g. after creating them upstream.
+    
+    Args:
+        entries: Meal plan rows keyed by MEAL_PLAN_COLUMNS
+        
+    Returns:
+        int: Number of entries written
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    if not entries:
+        return 0
+    try:
+        with get_connection() as conn:
+            changed = _upsert_meal_plan_entries(conn.cursor(), entries, datetime.now(UTC).isoformat())
+            conn.commit()
+            return changed
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to upsert meal plan entries: {e}")
+        raise
+
+@_timed
+def delete_meal_plan_entries(entry_ids: List[int]) -> int:
+    """
+    Remove entries from the mirror, e.g. after deleting them upstream.
+    
+    Args:
+        entry_ids: IDs of the meal plan entries
+        
+    Returns:
+        int: Number of entries removed
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    if not entry_ids:
+        return 0
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("DELETE FROM meal_plan_entries WHERE id = ?", [(i,) for i in entry_ids])
+            conn.commit()
+            return cursor.rowcount
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to delete meal plan entries {entry_ids}: {e}")
+        raise
+
+@_timed
+def replace_recipe_index(entries: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Store a complete upstream listing of recipes in the slug index.
+    
+    Recipes missing from ``entries`` were deleted or renamed upstream and
+    are removed, and the time of the full sync is recorded.
+    
+    Args:
+        entries: Recipe rows keyed by RECIPE_INDEX_COLUMNS
+        
+    Returns:
+        Dict[str, int]: Number of ``indexed`` and ``deleted`` recipes
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    synced_at = datetime.now(UTC).isoformat()
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            _upsert_recipe_index(cursor, entries, synced_at)
+            cursor.execute("DELETE FROM recipe_index WHERE synced_at < ?", (synced_at,))
+            deleted = cursor.rowcount
+            cursor.execute(
+                "INSERT OR REPLACE INTO sync_state (name, synced_at) VALUES ('recipe_index', ?)",
+                (synced_at,)
+            )
+            conn.commit()
+            return {"indexed": len(entries), "deleted": deleted}
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to replace recipe index: {e}")
+        raise
+
+def _upsert_recipe_index(cursor: sqlite3.Cursor, entries: List[Dict[str, Any]], synced_at: str) -> None:
+    columns = ", ".join(RECIPE_INDEX_COLUMNS)
+    placeholders = ", ".join("?" for _ in RECIPE_INDEX_COLUMNS)
+    cursor.executemany(
+        f"INSERT OR REPLACE INTO recipe_index ({columns}, synced_at) VALUES ({placeholders}, ?)",
+        [tuple(entry[column] for column in RECIPE_INDEX_COLUMNS) + (synced_at,) for entry in entries]
+    )
+
+@_timed
+def upsert_recipe_index(entries: List[Dict[str, Any]]) -> int:
+    """
+    Add individual recipes to the slug index, e.g. after fetching them in full.
+    
+    Args:
+        entries: Recipe rows keyed by RECIPE_INDEX_COLUMNS
+        
+    Returns:
+        int: Number of recipes written
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    if not entries:
+        return 0
+    try:
+        with get_connection() as conn:
+            _upsert_recipe_index(conn.cursor(), entries, datetime.now(UTC).isoformat())
+            conn.commit()
+            return len(entries)
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to upsert recipe index: {e}")
+        raise
+
+@_timed
+def get_indexed_recipes(slugs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up recipes in the slug index.
+    
+    Args:
+        slugs: Recipe slugs
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: Rows keyed by RECIPE_INDEX_COLUMNS, by slug;
+        unknown slugs are left out
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    slugs = list(dict.fromkeys(slugs))
+    if not slugs:
+        return {}
+    columns = ", ".join(RECIPE_INDEX_COLUMNS)
+    found = {}
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(slugs), 500):
+                chunk = slugs[i:i + 500]
+                cursor.execute(
+                    f"SELECT {columns} FROM recipe_index WHERE slug IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    found[row[0]] = dict(zip(RECIPE_INDEX_COLUMNS, row))
+            return found
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to look up recipes in the index: {e}")
+        raise
+
+@_timed
+def get_recipe_index_age() -> Optional[float]:
+    """
+    Get how long ago the recipe index was last fully synced.
+    
+    Returns:
+        Optional[float]: Age in seconds, or None if it was never synced
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT synced_at FROM sync_state WHERE name = 'recipe_index'")
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return (datetime.now(UTC) - datetime.fromisoformat(row[0])).total_seconds()
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to read recipe index sync time: {e}")
+        raise
+
+@_timed
 def get_shopping_ids() -> List[str]:
     """
     Get all ingredient IDs from the shopping list.
@@ -148,7 +690,7 @@ def get_shopping_ids() -> List[str]:
         sqlite3.Error: If database operation fails
     """
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT ingredient_id FROM shopping_list ORDER BY ingredient_name")
             return [row[0] for row in cursor.fetchall()]
@@ -157,20 +699,32 @@ def get_shopping_ids() -> List[str]:
         logger.error(f"Failed to get shopping list IDs: {e}")
         raise
 
-def add_shopping_items(items: List[Tuple[str, str]]) -> int:
+@_timed
+def get_shopping_items() -> List[Tuple[str, str, Optional[str]]]:
     """
-    Replace all items in the shopping list with new items.
+    Get all items in the shopping list.
     
-    Args:
-        items: List of tuples containing (ingredient_id, ingredient_name)
-        
     Returns:
-        int: Number of items added to the shopping list
+        List[Tuple[str, str, Optional[str]]]: (ingredient_id, ingredient_name, og_synced_at)
+        tuples ordered by name
         
     Raises:
-        ValueError: If items is invalid
         sqlite3.Error: If database operation fails
     """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT ingredient_id, ingredient_name, og_synced_at FROM shopping_list "
+                "ORDER BY ingredient_name, ingredient_id"
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to get shopping list items: {e}")
+        raise
+
+def _validate_shopping_items(items: List[Tuple[str, str]]) -> None:
     if items is None:
         raise ValueError("items cannot be None")
     
@@ -183,36 +737,402 @@ def add_shopping_items(items: List[Tuple[str, str]]) -> int:
             raise ValueError(f"Item at index {i} must be a tuple/list of length 2")
         if not isinstance(item[0], str) or not isinstance(item[1], str):
             raise ValueError(f"Item at index {i} must contain two strings")
+
+@_timed
+def update_shopping_items(items: List[Tuple[str, str]]) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Make the shopping list match ``items``, writing only the difference.
+    
+    Rows that are already stored are left untouched (apart from a changed
+    name), so their OurGroceries sync state is preserved.
+    
+    Args:
+        items: List of tuples containing (ingredient_id, ingredient_name)
+        
+    Returns:
+        Dict[str, List[Tuple[str, str]]]: ``added`` and ``removed`` items
+        
+    Raises:
+        ValueError: If items is invalid
+        sqlite3.Error: If database operation fails
+    """
+    _validate_shopping_items(items)
+    wanted = {ingredient_id: name for ingredient_id, name in items}
     
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT ingredient_id, ingredient_name FROM shopping_list")
+            stored = dict(cursor.fetchall())
             
-            # Use a transaction to ensure atomicity
-            cursor.execute("BEGIN TRANSACTION")
+            added = [(i, n) for i, n in wanted.items() if i not in stored]
+            removed = [(i, n) for i, n in stored.items() if i not in wanted]
+            renamed = [(n, i) for i, n in wanted.items() if i in stored and stored[i] != n]
+            
+            if removed:
+                cursor.executemany(
+                    "DELETE FROM shopping_list WHERE ingredient_id = ?",
+                    [(i,) for i, _ in removed]
+                )
+            if added:
+                cursor.executemany(
+                    "INSERT INTO shopping_list (ingredient_id, ingredient_name) VALUES (?, ?)",
+                    added
+                )
+            if renamed:
+                cursor.executemany(
+                    "UPDATE shopping_list SET ingredient_name = ? WHERE ingredient_id = ?",
+                    renamed
+                )
+            conn.commit()
+            
+            logger.info(f"Updated shopping list: {len(added)} added, {len(removed)} removed")
+            return {"added": added, "removed": removed}
             
-            try:
-                # Clear existing items
-                cursor.execute("DELETE FROM shopping_list")
-                
-                # Insert new items
-                if items:  # Only insert if there are items
-                    cursor.executemany(
-                        "INSERT INTO shopping_list (ingredient_id, ingredient_name) VALUES (?, ?)",
-                        items
-                    )
-                
-                conn.commit()
-                logger.info(f"Updated shopping list with {len(items)} items")
-                return len(items)
-                
-            except Exception as e:
-                conn.rollback()
-                raise e
-                
     except sqlite3.Error as e:
         logger.error(f"Failed to update shopping list: {e}")
         raise
 
+@_timed
+def get_unsynced_shopping_items() -> List[Tuple[str, str]]:
+    """
+    Get shopping list items that have not been sent to OurGroceries yet.
+    
+    Returns:
+        List[Tuple[str, str]]: (ingredient_id, ingredient_name) tuples
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT ingredient_id, ingredient_name FROM shopping_list "
+                "WHERE og_synced_at IS NULL ORDER BY ingredient_name"
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to get unsynced shopping items: {e}")
+        raise
+
+def _utc_iso(delta_seconds: float = 0) -> str:
+    return (datetime.now(UTC) + timedelta(seconds=delta_seconds)).isoformat()
+
+@_timed
+def enqueue_og_sync(list_name: str, items: List[Tuple[str, str]]) -> Optional[int]:
+    """
+    Queue shopping items to be sent to an OurGroceries list.
+    
+    Items already waiting in (or being sent by) an earlier job are skipped, and
+    new items are merged into a pending job for the same list if one exists.
+    
+    Args:
+        list_name: Name of the OurGroceries list
+        items: List of tuples containing (ingredient_id, ingredient_name)
+        
+    Returns:
+        Optional[int]: ID of the job holding the items, or None if nothing is queued
+        
+    Raises:
+        ValueError: If items is invalid
+        sqlite3.Error: If database operation fails
+    """
+    _validate_shopping_items(items)
+    
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                SELECT i.ingredient_id, j.id FROM og_sync_job_items i
+                JOIN og_sync_jobs j ON j.id = i.job_id
+                WHERE j.list_name = ? AND j.status IN ('pending', 'running')
+            """, (list_name,))
+            active = dict(cursor.fetchall())
+            new_items = list({i: (i, n) for i, n in items if i not in active}.values())
+            
+            if not new_items:
+                conn.commit()
+                job_ids = [active[i] for i, _ in items if i in active]
+                return max(job_ids) if job_ids else None
+            
+            now = _utc_iso()
+            cursor.execute(
+                "SELECT id FROM og_sync_jobs WHERE list_name = ? AND status = 'pending' "
+                "ORDER BY id DESC LIMIT 1",
+                (list_name,)
+            )
+            row = cursor.fetchone()
+            if row:
+                job_id = row[0]
+                # Coalesce into the waiting job and send it right away
+                cursor.execute(
+                    "UPDATE og_sync_jobs SET next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                    (now, now, job_id)
+                )
+            else:
+                cursor.execute(
+                    "INSERT INTO og_sync_jobs (list_name, next_attempt_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (list_name, now, now, now)
+                )
+                job_id = cursor.lastrowid
+            
+            cursor.executemany(
+                "INSERT OR IGNORE INTO og_sync_job_items (job_id, ingredient_id, ingredient_name) "
+                "VALUES (?, ?, ?)",
+                [(job_id, i, n) for i, n in new_items]
+            )
+            conn.commit()
+            logger.info(f"Queued {len(new_items)} items for OurGroceries in job {job_id}")
+            return job_id
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to queue OurGroceries sync: {e}")
+        raise
+
+@_timed
+def claim_og_sync_job(stale_after: float = 300) -> Optional[Dict[str, Any]]:
+    """
+    Atomically claim the next due OurGroceries sync job.
+    
+    Jobs left running for longer than ``stale_after`` seconds (e.g. by a
+    worker that died) are put back in the queue first.
+    
+    Args:
+        stale_after: Seconds after which a running job is considered abandoned
+        
+    Returns:
+        Optional[Dict[str, Any]]: The claimed job with its ``items``, or None
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            now = _utc_iso()
+            cursor.execute(
+                "UPDATE og_sync_jobs SET status = 'pending', claimed_at = NULL "
+                "WHERE status = 'running' AND claimed_at < ?",
+                (_utc_iso(-stale_after),)
+            )
+            cursor.execute(
+                "SELECT id, list_name, attempts FROM og_sync_jobs "
+                "WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT 1",
+                (now,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            
+            job_id, list_name, attempts = row
+            cursor.execute(
+                "UPDATE og_sync_jobs SET status = 'running', claimed_at = ?, updated_at = ? WHERE id = ?",
+                (now, now, job_id)
+            )
+            cursor.execute(
+                "SELECT ingredient_id, ingredient_name FROM og_sync_job_items WHERE job_id = ?",
+                (job_id,)
+            )
+            items = [tuple(r) for r in cursor.fetchall()]
+            conn.commit()
+            return {"id": job_id, "list_name": list_name, "attempts": attempts, "items": items}
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to claim OurGroceries sync job: {e}")
+        raise
+
+@_timed
+def complete_og_sync_job(job_id: int) -> None:
+    """
+    Mark a sync job as done and its items as synced to OurGroceries.
+    
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            now = _utc_iso()
+            cursor.execute(
+                "UPDATE og_sync_jobs SET status = 'done', attempts = attempts + 1, "
+                "claimed_at = NULL, last_error = NULL, updated_at = ? WHERE id = ?",
+                (now, job_id)
+            )
+            cursor.execute("""
+                UPDATE shopping_list SET og_synced_at = ?
+                WHERE ingredient_id IN (SELECT ingredient_id FROM og_sync_job_items WHERE job_id = ?)
+            """, (now, job_id))
+            conn.commit()
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to complete OurGroceries sync job {job_id}: {e}")
+        raise
+
+@_timed
+def fail_og_sync_job(job_id: int, error: str, retry_in: Optional[float]) -> str:
+    """
+    Record a failed attempt, scheduling a retry or giving up.
+    
+    Args:
+        job_id: The job that failed
+        error: Error message to store
+        retry_in: Seconds until the next attempt, or None to give up
+        
+    Returns:
+        str: The new job status ('pending' or 'failed')
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    status = "failed" if retry_in is None else "pending"
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE og_sync_jobs SET status = ?, attempts = attempts + 1, claimed_at = NULL, "
+                "last_error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (status, error, _utc_iso(retry_in or 0), _utc_iso(), job_id)
+            )
+            conn.commit()
+            return status
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to record OurGroceries sync failure for job {job_id}: {e}")
+        raise
+
+@_timed
+def get_og_sync_job(job_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the status of an OurGroceries sync job.
+    
+    Returns:
+        Optional[Dict[str, Any]]: Job details, or None if it does not exist
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, list_name, status, attempts, next_attempt_at, last_error, "
+                "created_at, updated_at FROM og_sync_jobs WHERE id = ?",
+                (job_id,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(zip(
+                ("id", "list_name", "status", "attempts", "next_attempt_at",
+                 "last_error", "created_at", "updated_at"),
+                row
+            ))
+            cursor.execute("SELECT COUNT(*) FROM og_sync_job_items WHERE job_id = ?", (job_id,))
+            job["item_count"] = cursor.fetchone()[0]
+            return job
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to get OurGroceries sync job {job_id}: {e}")
+        raise
+
+@_timed
+def prune_og_sync_jobs(older_than_days: int = 7) -> int:
+    """
+    Delete finished (done or failed) sync jobs older than the given age.
+    
+    Returns:
+        int: Number of jobs deleted
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cutoff = _utc_iso(-older_than_days * 86400)
+            cursor.execute(
+                "DELETE FROM og_sync_job_items WHERE job_id IN ("
+                "SELECT id FROM og_sync_jobs WHERE status IN ('done', 'failed') AND updated_at < ?)",
+                (cutoff,)
+            )
+            cursor.execute(
+                "DELETE FROM og_sync_jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (cutoff,)
+            )
+            conn.commit()
+            return cursor.rowcount
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to prune OurGroceries sync jobs: {e}")
+        raise
+
+@_timed
+def prune_done_meals(
+    older_than_days: int = 365,
+    window_start: Optional[str] = None,
+    window_end: Optional[str] = None,
+) -> int:
+    """
+    Delete done rows that are no longer useful.
+    
+    A row is pruned when its meal has disappeared upstream: a meal plan sync
+    that covered the meal's date, and ran after the meal was marked done, did
+    not find it. A row marked done more than ``older_than_days`` ago (0 keeps
+    rows forever) is pruned only if its meal can no longer be shown as not
+    done: it is dated before the served window, or the window has been synced
+    and the meal is not in it.
+    
+    Args:
+        older_than_days: Retention horizon in days, or 0 for no age limit
+        window_start: First day of the served meal plan window, or None for unbounded
+        window_end: Last day of the served meal plan window, or None for unbounded
+        
+    Returns:
+        int: Number of done rows deleted
+        
+    Raises:
+        sqlite3.Error: If database operation fails
+    """
+    start, end = window_start or _MIN_DATE, window_end or _MAX_DATE
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT d.meal_id FROM done_meals d "
+                "WHERE d.meal_date IS NOT NULL "
+                "AND NOT EXISTS (SELECT 1 FROM meal_plan_entries m WHERE m.id = d.meal_id) "
+                "AND EXISTS (SELECT 1 FROM meal_plan_sync_windows w "
+                "WHERE w.start_date <= d.meal_date AND w.end_date >= d.meal_date AND w.synced_at > d.done_at)"
+            )
+            stale = {row[0] for row in cursor.fetchall()}
+            if older_than_days > 0:
+                cursor.execute(
+                    "SELECT d.meal_id FROM done_meals d WHERE d.done_at < ? AND ("
+                    "(d.meal_date IS NOT NULL AND d.meal_date < ?) "
+                    "OR (NOT EXISTS (SELECT 1 FROM meal_plan_entries m WHERE m.id = d.meal_id) "
+                    "AND EXISTS (SELECT 1 FROM meal_plan_sync_windows w "
+                    "WHERE w.start_date <= ? AND w.end_date >= ?)))",
+                    (_utc_iso(-older_than_days * 86400), start, start, end)
+                )
+                stale.update(row[0] for row in cursor.fetchall())
+            if stale:
+                cursor.executemany("DELETE FROM done_meals WHERE meal_id = ?", [(i,) for i in stale])
+            conn.commit()
+            
+        if stale:
+            logger.info(f"Pruned {len(stale)} done meals")
+        return len(stale)
+            
+    except sqlite3.Error as e:
+        logger.error(f"Failed to prune done meals: {e}")
+        raise
+
 # Import schema versioning functions from db_setup.py
 from db_setup import get_schema_version, check_schema_compatibility
\ No newline at end of file
@@ -9,11 +9,12 @@ import shutil
 import sys
 from datetime import datetime
 from logging_config import get_logger
+import config
 
 logger = get_logger(__name__)
 
-DB_PATH = "planner.db"
-CURRENT_SCHEMA_VERSION = 2
+DB_PATH = config.DB_PATH
+CURRENT_SCHEMA_VERSION = 8
 
 def _get_schema_version(conn: sqlite3.Connection) -> int:
     """Get the current schema version from the database."""
@@ -40,6 +41,88 @@ def _set_schema_version(conn: sqlite3.Connection, version: int) -> None:
         (version, datetime.now().isoformat())
     )
 
+def _create_og_sync_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the outbound OurGroceries sync queue tables."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS og_sync_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            list_name TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            claimed_at TEXT,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_og_sync_jobs_status
+        ON og_sync_jobs (status, next_attempt_at)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS og_sync_job_items (
+            job_id INTEGER NOT NULL REFERENCES og_sync_jobs(id) ON DELETE CASCADE,
+            ingredient_id TEXT NOT NULL,
+            ingredient_name TEXT NOT NULL,
+            PRIMARY KEY (job_id, ingredient_id)
+        )
+    """)
+
+def _create_meal_plan_mirror_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the local mirror of Mealie meal plan entries."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meal_plan_entries (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            entry_type TEXT,
+            title TEXT,
+            text TEXT,
+            recipe_id TEXT,
+            recipe_slug TEXT,
+            recipe_name TEXT,
+            recipe_description TEXT,
+            recipe_prep_time TEXT,
+            recipe_perform_time TEXT,
+            recipe_updated_at TEXT,
+            updated_at TEXT,
+            fingerprint TEXT NOT NULL,
+            synced_at TEXT NOT NULL
+        )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_meal_plan_entries_date ON meal_plan_entries (date)"
+    )
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meal_plan_sync_windows (
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            synced_at TEXT NOT NULL,
+            PRIMARY KEY (start_date, end_date)
+        )
+    """)
+
+def _create_recipe_index_tables(cursor: sqlite3.Cursor) -> None:
+    """Create the slug -> recipe summary index and the table recording full syncs."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_index (
+            slug TEXT PRIMARY KEY,
+            id TEXT NOT NULL,
+            name TEXT,
+            description TEXT,
+            prep_time TEXT,
+            perform_time TEXT,
+            updated_at TEXT,
+            synced_at TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            name TEXT PRIMARY KEY,
+            synced_at TEXT NOT NULL
+        )
+    """)
+
 def _create_initial_schema(conn: sqlite3.Connection) -> None:
     """Create the initial database schema."""
     cursor = conn.cursor()
@@ -48,16 +131,23 @@ def _create_initial_schema(conn: sqlite3.Connection) -> None:
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS done_meals (
             meal_id INTEGER PRIMARY KEY,
-            done_at TEXT
+            done_at TEXT,
+            meal_date TEXT
         )
     """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_done_meals_done_at ON done_meals (done_at)")
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS shopping_list (
             ingredient_id TEXT PRIMARY KEY,
-            ingredient_name TEXT
+            ingredient_name TEXT,
+            og_synced_at TEXT
         )
     """)
     
+    _create_og_sync_tables(cursor)
+    _create_meal_plan_mirror_tables(cursor)
+    _create_recipe_index_tables(cursor)
+    
     # Set initial schema version
     _set_schema_version(conn, CURRENT_SCHEMA_VERSION)
     
@@ -103,6 +193,50 @@ def _migrate_v1_to_v2(conn: sqlite3.Connection) -> None:
     _set_schema_version(conn, 2)
     logger.info("✅ Schema versioning system added")
 
+def _migrate_v2_to_v3(conn: sqlite3.Connection) -> None:
+    """Migrate from version 2 to version 3 - track OurGroceries sync per shopping item."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(shopping_list)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "og_synced_at" not in columns:
+        cursor.execute("ALTER TABLE shopping_list ADD COLUMN og_synced_at TEXT")
+    _set_schema_version(conn, 3)
+    logger.info("✅ Added og_synced_at to shopping_list table")
+
+def _migrate_v3_to_v4(conn: sqlite3.Connection) -> None:
+    """Migrate from version 3 to version 4 - add the OurGroceries sync queue."""
+    _create_og_sync_tables(conn.cursor())
+    _set_schema_version(conn, 4)
+    logger.info("✅ Added og_sync_jobs and og_sync_job_items tables")
+
+def _migrate_v4_to_v5(conn: sqlite3.Connection) -> None:
+    """Migrate from version 4 to version 5 - remember the planned date of done meals."""
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(done_meals)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "meal_date" not in columns:
+        cursor.execute("ALTER TABLE done_meals ADD COLUMN meal_date TEXT")
+    _set_schema_version(conn, 5)
+    logger.info("✅ Added meal_date to done_meals table")
+
+def _migrate_v5_to_v6(conn: sqlite3.Connection) -> None:
+    """Migrate from version 5 to version 6 - add the local meal plan mirror."""
+    _create_meal_plan_mirror_tables(conn.cursor())
+    _set_schema_version(conn, 6)
+    logger.info("✅ Added meal_plan_entries and meal_plan_sync_windows tables")
+
+def _migrate_v6_to_v7(conn: sqlite3.Connection) -> None:
+    """Migrate from version 6 to version 7 - index done_meals by done_at for retention pruning."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_done_meals_done_at ON done_meals (done_at)")
+    _set_schema_version(conn, 7)
+    logger.info("✅ Added idx_done_meals_done_at index")
+
+def _migrate_v7_to_v8(conn: sqlite3.Connection) -> None:
+    """Migrate from version 7 to version 8 - add the slug -> recipe index."""
+    _create_recipe_index_tables(conn.cursor())
+    _set_schema_version(conn, 8)
+    logger.info("✅ Added recipe_index and sync_state tables")
+
 def setup_database() -> int:
     """
     Complete database setup: initialization + migrations.
@@ -116,8 +250,8 @@ def setup_database() -> int:
     try:
         db_exists = os.path.exists(DB_PATH)
         
-        # Ensure the backup directory exists
-        backup_dir = "db_backups"
+        # Ensure the backup directory, next to the database, exists
+        backup_dir = os.path.join(os.path.dirname(DB_PATH), "db_backups")
         os.makedirs(backup_dir, exist_ok=True)
 
         backup_created = False
@@ -126,7 +260,7 @@ def setup_database() -> int:
             with sqlite3.connect(DB_PATH) as conn:
                 current_version = _get_schema_version(conn)
                 if current_version < CURRENT_SCHEMA_VERSION:
-                    backup_path = os.path.join(backup_dir, f"{DB_PATH}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+                    backup_path = os.path.join(backup_dir, f"{os.path.basename(DB_PATH)}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}")
                     shutil.copy2(DB_PATH, backup_path)
                     logger.info(f"📦 Database backed up to {backup_path}")
                     backup_created = True
@@ -163,6 +297,36 @@ def setup_database() -> int:
                 _migrate_v1_to_v2(conn)
                 current_version = 2
             
+            if current_version < 3:
+                logger.info("🔄 Running migration: v2 -> v3")
+                _migrate_v2_to_v3(conn)
+                current_version = 3
+            
+            if current_version < 4:
+                logger.info("🔄 Running migration: v3 -> v4")
+                _migrate_v3_to_v4(conn)
+                current_version = 4
+            
+            if current_version < 5:
+                logger.info("🔄 Running migration: v4 -> v5")
+                _migrate_v4_to_v5(conn)
+                current_version = 5
+            
+            if current_version < 6:
+                logger.info("🔄 Running migration: v5 -> v6")
+                _migrate_v5_to_v6(conn)
+                current_version = 6
+            
+            if current_version < 7:
+                logger.info("🔄 Running migration: v6 -> v7")
+                _migrate_v6_to_v7(conn)
+                current_version = 7
+            
+            if current_version < 8:
+                logger.info("🔄 Running migration: v7 -> v8")
+                _migrate_v7_to_v8(conn)
+                current_version = 8
+            
             conn.commit()
             logger.info(f"✅ Database setup completed successfully! Schema version: {current_version}")
             return 0
@@ -0,0 +1,36 @@
+"""
+Gunicorn settings for the Meal Planner. Every value can be overridden with
+an environment variable; see the README for how state is shared between
+worker processes.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Threaded workers: requests mostly wait on Mealie, SQLite or OurGroceries
+worker_class = "gthread"
+workers = int(os.getenv("WEB_WORKERS", 2))
+threads = int(os.getenv("WEB_THREADS", 8))
+
+# Kill a worker stuck on a single request for longer than this
+timeout = int(os.getenv("WEB_TIMEOUT", 60))
+# Time in-flight requests get to finish on reload (SIGHUP) or shutdown
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("WEB_KEEPALIVE", 5))
+
+# Recycle workers periodically to bound memory growth of in-process caches
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 100))
+
+# Each worker imports the app itself, so it gets its own HTTP pools,
+# SQLite connections and background threads
+preload_app = False
+
+accesslog = os.getenv("WEB_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def on_starting(server):
+    """Run database setup and migrations once, in the master, before any worker starts."""
+    from db import init_db
+    init_db()
@@ -0,0 +1,201 @@
+"""
+On-disk cache for recipe images proxied from Mealie.
+
+Files are content-addressed by recipe id and upstream ETag, so a changed
+image upstream gets a new file name. The cache is bounded by total size and
+evicts the least recently used images first.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_SEPARATOR = "--"
+
+
+@dataclass
+class ImageEntry:
+    """A cached image file and the upstream ETag it was stored under."""
+    path: str
+    etag: str
+    size: int
+    content_type: str
+    validated_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.validated_at < ttl
+
+
+def _file_name(recipe_id: str, etag: str, content_type: str) -> str:
+    ext = mimetypes.guess_extension(content_type.split(";")[0].strip()) or ".bin"
+    return f"{recipe_id}{_SEPARATOR}{etag.encode().hex()}{ext}"
+
+
+def _parse_file_name(name: str):
+    """Return (recipe_id, etag, content_type) for a cache file name, or None."""
+    stem, ext = os.path.splitext(name)
+    recipe_id, sep, etag_hex = stem.rpartition(_SEPARATOR)
+    if not sep or not recipe_id:
+        return None
+    try:
+        etag = bytes.fromhex(etag_hex).decode()
+    except ValueError:
+        return None
+    content_type = mimetypes.types_map.get(ext, "application/octet-stream")
+    return recipe_id, etag, content_type
+
+
+class ImageCache:
+    """
+    Size-bounded LRU cache of recipe images on disk.
+
+    Each recipe id (or resized variant key, see ``image_variants``) maps to at
+    most one file. Entries older than ``ttl`` are still served but should be
+    revalidated against upstream by the caller.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float = 86400):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, ImageEntry]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        """Index existing files, oldest first, and remove orphaned duplicates."""
+        found = []
+        for name in os.listdir(self.directory):
+            parsed = _parse_file_name(name)
+            if parsed is None:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            found.append((st.st_mtime, st.st_size, path, parsed))
+
+        for mtime, size, path, (recipe_id, etag, content_type) in sorted(found):
+            previous = self._entries.pop(recipe_id, None)
+            if previous is not None:
+                self._remove_file(previous)
+            self._entries[recipe_id] = ImageEntry(path, etag, size, content_type, mtime)
+            self._total += size
+
+        self._evict()
+        logger.info(f"Image cache loaded {len(self._entries)} files ({self._total} bytes) from {self.directory}")
+
+    def _remove_file(self, entry: ImageEntry) -> None:
+        self._total -= entry.size
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove cached image {entry.path}: {e}")
+
+    def _evict(self) -> None:
+        # Never evict the most recent entry, even if it alone exceeds the limit
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._remove_file(entry)
+
+    def lookup(self, recipe_id: str) -> Optional[ImageEntry]:
+        """Return the cached entry for ``recipe_id`` (fresh or stale), or None."""
+        with self._lock:
+            entry = self._entries.get(recipe_id)
+            if entry is not None and not os.path.exists(entry.path):
+                # Evicted by another worker process sharing the directory
+                self._entries.pop(recipe_id)
+                self._total -= entry.size
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(recipe_id)
+            self.hits += 1
+            return entry
+
+    def current_etag(self, recipe_id: str) -> Optional[str]:
+        """Return the ETag of the cached image without touching the disk or the stats."""
+        with self._lock:
+            entry = self._entries.get(recipe_id)
+            return entry.etag if entry is not None else None
+
+    def mark_validated(self, recipe_id: str) -> None:
+        """Record that upstream confirmed the cached image is unchanged (304)."""
+        with self._lock:
+            entry = self._entries.get(recipe_id)
+            if entry is None:
+                return
+            entry.validated_at = time.time()
+            try:
+                os.utime(entry.path)
+            except OSError:
+                pass
+
+    def store(self, recipe_id: str, etag: Optional[str], content_type: str,
+              chunks: Iterable[bytes]) -> ImageEntry:
+        """
+        Write an image to the cache and return its entry.
+
+        When upstream sends no ETag, a strong ETag is derived from the content.
+        """
+        digest = hashlib.sha1()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+            etag = etag or f'"{digest.hexdigest()}"'
+            path = os.path.join(self.directory, _file_name(recipe_id, etag, content_type))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        entry = ImageEntry(path, etag, size, content_type, time.time())
+        with self._lock:
+            previous = self._entries.pop(recipe_id, None)
+            if previous is not None:
+                if previous.path == path:
+                    self._total -= previous.size
+                else:
+                    self._remove_file(previous)
+            self._entries[recipe_id] = entry
+            self._total += size
+            self._evict()
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "files": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,66 @@
+"""
+Resized variants of cached recipe images.
+
+Cards display recipe images at little more than 100 CSS pixels, so the
+planner serves a few fixed-width WebP variants next to the original and lets
+the browser pick one through ``srcset``. Variants are stored in the image
+cache under their own key, with an ETag derived from the source image's
+ETag and the width, so a changed source image produces new variants.
+"""
+import hashlib
+import io
+from typing import Optional
+
+from PIL import Image, UnidentifiedImageError
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Variant name -> width in pixels
+VARIANTS = {"thumb": 160, "card": 320, "full": 800}
+
+QUALITY = 80
+
+
+def version(source_etag: str) -> str:
+    """Short token identifying a source image, used to make image URLs immutable."""
+    return hashlib.sha1(source_etag.encode()).hexdigest()[:12]
+
+
+def variant_key(recipe_id: str, variant: str) -> str:
+    """Image cache key under which a variant of ``recipe_id`` is stored."""
+    return f"{recipe_id}@{variant}"
+
+
+def variant_etag(source_etag: str, width: int) -> str:
+    return f'"{version(source_etag)}-{width}w"'
+
+
+def resize(source_path: str, width: int, quality: int = QUALITY) -> Optional[bytes]:
+    """
+    Return the image at ``source_path`` scaled down to ``width`` pixels wide,
+    encoded as WebP.
+
+    Returns:
+        Optional[bytes]: None if the image is already that narrow or cannot be
+        decoded, in which case the source should be served instead
+
+    Raises:
+        OSError: If the file cannot be read, e.g. it was evicted meanwhile
+    """
+    try:
+        with Image.open(source_path) as image:
+            if image.width <= width:
+                return None
+            height = max(1, round(image.height * width / image.width))
+            image.draft("RGB", (width, height))
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, "WEBP", quality=quality, method=4)
+            return out.getvalue()
+    except (UnidentifiedImageError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not decode {source_path} to resize it to {width}px: {e}")
+        return None
@@ -0,0 +1,156 @@
+"""
+Local SQLite mirror of the Mealie meal plan.
+
+Pages read meal plan entries from ``meal_plan_entries`` instead of calling
+Mealie on every request. ``MealPlanMirror.sync`` pulls a date window from
+Mealie and writes only the entries that changed; the background prefetcher
+calls it periodically. Requests only sync inline when their window has never
+been synced; a window whose last sync is older than ``max_age`` is served
+as-is while a background refresh brings it up to date. Concurrent syncs of
+the same window share one set of upstream requests.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+import db
+from logging_config import get_logger
+from mealie_client import MealieClient, MealieError
+from resilience import BackgroundRefresher, SingleFlight
+
+logger = get_logger(__name__)
+
+
+def item_to_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Mealie meal plan item to a ``meal_plan_entries`` row."""
+    recipe = item.get("recipe") or {}
+    row = {
+        "id": item["id"],
+        "date": item.get("date"),
+        "entry_type": item.get("entryType"),
+        "title": item.get("title"),
+        "text": item.get("text"),
+        "recipe_id": recipe.get("id") or item.get("recipeId"),
+        "recipe_slug": recipe.get("slug"),
+        "recipe_name": recipe.get("name"),
+        "recipe_description": recipe.get("description"),
+        "recipe_prep_time": recipe.get("prepTime"),
+        "recipe_perform_time": recipe.get("performTime"),
+        "recipe_updated_at": recipe.get("updatedAt") or recipe.get("dateUpdated"),
+        "updated_at": item.get("updatedAt") or item.get("updateAt"),
+    }
+    row["fingerprint"] = hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode()).hexdigest()
+    return row
+
+
+def row_to_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a ``meal_plan_entries`` row back to the Mealie item shape the templates use."""
+    return {
+        "id": row["id"],
+        "date": row["date"],
+        "entryType": row["entry_type"],
+        "title": row["title"],
+        "text": row["text"],
+        "recipeId": row["recipe_id"],
+        "recipe": {
+            "id": row["recipe_id"],
+            "slug": row["recipe_slug"],
+            "name": row["recipe_name"],
+            "description": row["recipe_description"],
+            "prepTime": row["recipe_prep_time"],
+            "performTime": row["recipe_perform_time"],
+            "dateUpdated": row["recipe_updated_at"],
+        },
+    }
+
+
+class MealPlanMirror:
+    """Keeps ``meal_plan_entries`` in step with Mealie, one date window at a time."""
+
+    def __init__(self, client: MealieClient, max_age: float = 300, page_size: int = 100, page_workers: int = 4,
+                 refresher: Optional[BackgroundRefresher] = None):
+        self.client = client
+        self.max_age = max_age
+        self.page_size = page_size
+        self.page_workers = page_workers
+        self.refresher = refresher
+        self.flights = SingleFlight("meal_plans")
+        # Set while the last sync failed, so stale reads can be flagged
+        self.failing = False
+
+    def sync(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, int]:
+        """
+        Fetch every page of a window from Mealie and store it in the mirror.
+
+        A call made while the same window is already being synced waits for
+        that sync and returns its result.
+
+        Raises:
+            MealieError: If Mealie cannot be reached
+        """
+        return self.flights.do((start_date, end_date), lambda: self._sync(start_date, end_date))
+
+    def _sync(self, start_date: Optional[str], end_date: Optional[str]) -> Dict[str, int]:
+        pages = self.client.iter_meal_plans(
+            start_date, end_date, per_page=self.page_size, max_workers=self.page_workers
+        )
+        try:
+            items = [item for item in pages if item.get("id") is not None]
+        except MealieError:
+            self.failing = True
+            raise
+        self.failing = False
+        rows = [item_to_row(item) for item in items if item.get("date")]
+        # Pages are fetched separately, so an entry added or removed meanwhile
+        # can shift another one between pages. Only a listing with as many
+        # distinct entries as Mealie counted may delete missing ones.
+        received = len({item["id"] for item in items})
+        complete = received == pages.total
+        if not complete:
+            logger.warning(
+                f"Meal plan listing {start_date}..{end_date} changed while paging "
+                f"({received} of {pages.total} entries); keeping entries it did not return"
+            )
+        result = db.mirror_meal_plans(rows, start_date, end_date, complete=complete)
+        if result["changed"] or result["deleted"]:
+            logger.info(
+                f"Synced meal plans {start_date}..{end_date}: "
+                f"{result['changed']} changed, {result['deleted']} deleted"
+            )
+        return result
+
+    def ensure(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> bool:
+        """
+        Make sure the mirror can answer for the window.
+
+        A window that was never synced is synced inline. One whose last sync
+        is older than ``max_age`` is served as it is, and a background refresh
+        is scheduled (or, without a refresher, it is synced inline).
+
+        Returns:
+            bool: False if the mirror is stale and Mealie is failing, or a needed sync failed
+        """
+        age = db.get_meal_plan_window_age(start_date, end_date)
+        if age is not None and age <= self.max_age:
+            return True
+        if age is not None and self.refresher is not None:
+            self.refresher.submit(("meal_plans", start_date, end_date), lambda: self.sync(start_date, end_date))
+            return not self.failing and self.client.available
+        try:
+            self.sync(start_date, end_date)
+            return True
+        except MealieError as e:
+            logger.error(f"Meal plan sync failed, serving the local mirror: {e}")
+            return False
+
+    def record_created(self, item: Dict[str, Any], recipe: Optional[Dict[str, Any]] = None) -> None:
+        """Add an entry we just created upstream, filling in the recipe summary if missing."""
+        if item.get("id") is None or not item.get("date"):
+            return
+        if not item.get("recipe") and recipe:
+            item = {**item, "recipe": recipe}
+        db.upsert_meal_plan_entries([item_to_row(item)])
+
+    def record_deleted(self, entry_ids: List[int]) -> None:
+        """Drop entries we just deleted upstream."""
+        db.delete_meal_plan_entries(list(entry_ids))
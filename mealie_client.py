@@ -0,0 +1,360 @@
+"""
+Shared HTTP client for the Mealie API.
+
+All upstream calls go through a single ``requests.Session`` so connections
+are pooled and kept alive, every request has a connect/read timeout, and
+idempotent calls are retried with backoff on transient failures. An optional
+circuit breaker makes calls fail fast while Mealie keeps failing.
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+import metrics
+from logging_config import get_logger
+from resilience import CircuitBreaker
+
+logger = get_logger(__name__)
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class MealieError(Exception):
+    """Raised when a Mealie API call fails or returns an unusable response."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, url: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.url = url
+
+
+class CircuitOpenError(MealieError):
+    """Raised without contacting Mealie while the circuit breaker is open."""
+
+
+class Conditional(NamedTuple):
+    """Result of a conditional GET; ``data`` is None when upstream answered 304."""
+    data: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    @property
+    def not_modified(self) -> bool:
+        return self.data is None
+
+
+class Pages:
+    """
+    The items of a paginated Mealie listing, fetched while iterating.
+
+    The first page tells how many pages there are; the rest are fetched
+    concurrently and yielded in page order. At most ``max_workers`` pages are
+    requested ahead of the one being yielded, so memory stays bounded however
+    many pages there are. Once iteration has started, ``total`` holds the
+    item count Mealie reported on the first page; pages are fetched one by
+    one, so callers that need a complete snapshot should compare it with
+    what they received.
+    """
+
+    def __init__(self, fetch_page: Callable[[int], Dict[str, Any]], max_workers: int):
+        self.fetch_page = fetch_page
+        self.max_workers = max_workers
+        self.total: Optional[int] = None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        first = self.fetch_page(1)
+        self.total = first.get("total")
+        yield from first.get("items", [])
+
+        total_pages = first.get("total_pages") or 1
+        if total_pages <= 1:
+            return
+        workers = max(1, min(self.max_workers, total_pages - 1))
+        pages = iter(range(2, total_pages + 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque(pool.submit(self.fetch_page, page) for page in islice(pages, workers))
+            try:
+                while in_flight:
+                    data = in_flight.popleft().result()
+                    for page in islice(pages, 1):
+                        in_flight.append(pool.submit(self.fetch_page, page))
+                    yield from data.get("items", [])
+            finally:
+                # Stop fetching pages nobody will read if the caller gives up
+                for future in in_flight:
+                    future.cancel()
+
+
+class MealieClient:
+    """Pooled, keep-alive client for the subset of the Mealie API used by the planner."""
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        pool_size: int = 16,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        retries: int = 2,
+        backoff: float = 0.3,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_config(cls) -> "MealieClient":
+        return cls(
+            config.MEALIE_API_URL,
+            config.MEALIE_API_TOKEN,
+            pool_size=config.MEALIE_POOL_SIZE,
+            connect_timeout=config.MEALIE_CONNECT_TIMEOUT,
+            read_timeout=config.MEALIE_READ_TIMEOUT,
+            retries=config.MEALIE_RETRIES,
+            breaker=CircuitBreaker(
+                failure_threshold=config.MEALIE_BREAKER_THRESHOLD,
+                reset_timeout=config.MEALIE_BREAKER_RESET,
+                name="Mealie",
+            ) if config.MEALIE_BREAKER_THRESHOLD > 0 else None,
+        )
+
+    @property
+    def available(self) -> bool:
+        """False while the circuit breaker is refusing calls."""
+        return self.breaker is None or not self.breaker.is_open
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def request(self, method: str, path: str, timeout: Optional[Timeout] = None,
+                endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        Send a request to Mealie and return the raw response.
+
+        ``endpoint`` is the path template used as the metrics label, so
+        per-recipe and per-entry paths do not create a series each. Connection
+        errors, timeouts and 5xx responses count as failures for the circuit
+        breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            MealieError: On connection errors and timeouts
+        """
+        url = self.url(path)
+        if self.breaker is not None and not self.breaker.allow():
+            metrics.MEALIE_SECONDS.observe(0, method, endpoint or path, "circuit_open")
+            raise CircuitOpenError("Mealie is unavailable (circuit open)", url=url)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            status = str(response.status_code)
+            return response
+        except requests.RequestException as e:
+            logger.warning(f"Mealie {method} {path} failed: {e}")
+            raise MealieError(str(e), url=url) from e
+        finally:
+            metrics.MEALIE_SECONDS.observe(time.perf_counter() - start, method, endpoint or path, status)
+            if self.breaker is not None:
+                if status == "error" or status.startswith("5"):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+    def _json(self, response: requests.Response) -> Any:
+        if not response.ok:
+            raise MealieError(
+                response.text or f"HTTP {response.status_code}",
+                status_code=response.status_code,
+                url=response.url,
+            )
+        try:
+            return response.json()
+        except ValueError as e:
+            raise MealieError("Invalid JSON response", status_code=response.status_code, url=response.url) from e
+
+    # --- Meal plans -------------------------------------------------------
+
+    def get_meal_plans(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        page: int = 1,
+        per_page: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Return one meal plan page for the optional ``[start_date, end_date]`` window."""
+        # id breaks ties between entries on the same day, so pages don't overlap
+        params: Dict[str, Any] = {"page": page, "orderBy": "date,id", "orderDirection": "asc"}
+        if per_page:
+            params["perPage"] = per_page
+        if start_date:
+            params["start_date"] = start_date
+        if end_date:
+            params["end_date"] = end_date
+        return self._json(self.request("GET", "/api/households/mealplans", params=params))
+
+    def iter_meal_plans(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        per_page: int = 100,
+        max_workers: int = 4,
+    ) -> Pages:
+        """
+        Yield every meal plan item in the window, page by page.
+
+        Raises:
+            MealieError: If any page cannot be fetched
+        """
+        return Pages(
+            lambda page: self.get_meal_plans(start_date, end_date, page=page, per_page=per_page),
+            max_workers,
+        )
+
+    def create_meal_plan(self, date: str, recipe_id: str, entry_type: str = "dinner") -> Dict[str, Any]:
+        """Schedule ``recipe_id`` on ``date`` and return the created entry."""
+        payload = {"date": date, "recipeId": recipe_id, "entryType": entry_type}
+        return self._json(self.request("POST", "/api/households/mealplans", json=payload))
+
+    def create_meal_plans(
+        self, entries: Iterable[Tuple[str, str, str]], max_workers: int = 8
+    ) -> List[Union[Dict[str, Any], MealieError]]:
+        """
+        Create several meal plan entries concurrently over the shared pool.
+
+        Args:
+            entries: ``(date, recipe_id, entry_type)`` tuples
+
+        Returns:
+            List: The created entry, or the error, for each of ``entries`` in order
+        """
+        entries = list(entries)
+        if not entries:
+            return []
+
+        def create(entry):
+            try:
+                return self.create_meal_plan(*entry)
+            except MealieError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(entries)))) as pool:
+            return list(pool.map(create, entries))
+
+    def delete_meal_plan(self, item_id: int) -> None:
+        """Delete a meal plan entry."""
+        response = self.request(
+            "DELETE", f"/api/households/mealplans/{item_id}", endpoint="/api/households/mealplans/{id}"
+        )
+        if not response.ok:
+            raise MealieError(response.text, status_code=response.status_code, url=response.url)
+
+    def delete_meal_plans(self, item_ids: Iterable[int], max_workers: int = 8) -> Dict[int, Optional[MealieError]]:
+        """
+        Delete several meal plan entries concurrently over the shared pool.
+
+        Returns:
+            Dict[int, Optional[MealieError]]: None for each deleted entry, or the error
+        """
+        item_ids = list(dict.fromkeys(item_ids))
+        if not item_ids:
+            return {}
+
+        def delete(item_id):
+            try:
+                self.delete_meal_plan(item_id)
+                return None
+            except MealieError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(item_ids)))) as pool:
+            return dict(zip(item_ids, pool.map(delete, item_ids)))
+
+    # --- Recipes ----------------------------------------------------------
+
+    def get_recipes(self, page: int = 1, per_page: int = 100) -> Dict[str, Any]:
+        """Return one page of recipe summaries (no ingredients or instructions)."""
+        params = {"page": page, "perPage": per_page, "orderBy": "created_at,id", "orderDirection": "asc"}
+        return self._json(self.request("GET", "/api/recipes", params=params))
+
+    def iter_recipe_summaries(self, per_page: int = 100, max_workers: int = 4) -> Pages:
+        """
+        Yield the summary of every recipe, page by page.
+
+        Raises:
+            MealieError: If any page cannot be fetched
+        """
+        return Pages(lambda page: self.get_recipes(page=page, per_page=per_page), max_workers)
+
+    def get_recipe(
+        self,
+        slug: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> Conditional:
+        """
+        Fetch a full recipe by slug, optionally revalidating a cached copy.
+
+        Returns:
+            Conditional: ``data`` is None if Mealie answered 304 Not Modified
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = self.request(
+            "GET", f"/api/recipes/{slug}", headers=headers, timeout=timeout, endpoint="/api/recipes/{slug}"
+        )
+        if response.status_code == 304:
+            return Conditional(None, response.headers.get("ETag", etag), last_modified)
+        return Conditional(
+            self._json(response),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+    # --- Images -----------------------------------------------------------
+
+    def get_recipe_image(self, recipe_id: str, name: str = "min-original.webp", etag: Optional[str] = None) -> requests.Response:
+        """
+        Open a streamed response for a recipe image. The caller must close it.
+
+        Raises:
+            MealieError: If the image cannot be fetched
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self.request(
+            "GET", f"/api/media/recipes/{recipe_id}/images/{name}", headers=headers, stream=True,
+            endpoint="/api/media/recipes/{id}/images/{name}",
+        )
+        if not response.ok and response.status_code != 304:
+            response.close()
+            raise MealieError(f"HTTP {response.status_code}", status_code=response.status_code, url=response.url)
+        return response
@@ -0,0 +1,166 @@
+"""
+Minimal Prometheus-style metrics for the Meal Planner application.
+
+Histograms are kept in memory per process and rendered in the
+Prometheus text exposition format by ``render()``. Callables registered with
+``register_collector()`` add point-in-time samples (e.g. cache statistics)
+at scrape time.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; covers fast SQLite queries up to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class holding one set of values per combination of label values."""
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labelvalues: Sequence) -> Tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+        return tuple(str(v) for v in labelvalues)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, plus sum and count."""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, *labelvalues) -> None:
+        key = self._key(labelvalues)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        """Observe the wall-clock duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = sorted((key, [list(state[0]), state[1], state[2]]) for key, state in self._values.items())
+        for key, (counts, total, count) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+REGISTRY: List[Metric] = []
+_collectors: List[Tuple[str, str, str, Callable[[], Iterable[Tuple[Dict[str, str], float]]]]] = []
+
+
+def register_collector(name: str, documentation: str, metric_type: str,
+                       collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]) -> None:
+    """
+    Register a metric whose ``(labels, value)`` samples are computed at scrape time.
+
+    Args:
+        name: Metric name, including any ``_total`` suffix for counters
+        documentation: HELP text
+        metric_type: ``gauge`` or ``counter``
+        collect: Callable returning the current samples
+    """
+    _collectors.append((name, documentation, metric_type, collect))
+
+
+def render() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for name, documentation, metric_type, collect in _collectors:
+        family = name[:-len("_total")] if metric_type == "counter" and name.endswith("_total") else name
+        lines.append(f"# HELP {family} {documentation}")
+        lines.append(f"# TYPE {family} {metric_type}")
+        for labels, value in collect():
+            if value is not None:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Application metrics ----------------------------------------------------
+
+REQUEST_SECONDS = Histogram(
+    "mealplanner_request_duration_seconds",
+    "Time spent handling HTTP requests, including streamed bodies.",
+    ("method", "route", "status"),
+)
+MEALIE_SECONDS = Histogram(
+    "mealplanner_mealie_request_duration_seconds",
+    "Latency of Mealie API calls by endpoint and response status.",
+    ("method", "endpoint", "status"),
+)
+OG_SECONDS = Histogram(
+    "mealplanner_ourgroceries_duration_seconds",
+    "Latency of OurGroceries operations.",
+    ("operation", "outcome"),
+)
+SQLITE_SECONDS = Histogram(
+    "mealplanner_sqlite_query_duration_seconds",
+    "Time spent in database functions, including waiting for locks.",
+    ("function",),
+)
@@ -0,0 +1,103 @@
+"""
+Background worker that drains the OurGroceries sync queue.
+
+Routes only enqueue items (see ``db.enqueue_og_sync``); this worker sends
+them to OurGroceries off the request path, retrying failed jobs with
+exponential backoff.
+"""
+import os
+import threading
+from typing import Optional
+
+import config
+import db
+import ourgroceries_helper as og
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def retry_delay(attempts: int) -> Optional[float]:
+    """
+    Seconds to wait before the next attempt after ``attempts`` failures,
+    or None once the job has used up OG_SYNC_MAX_ATTEMPTS.
+    """
+    if attempts >= config.OG_SYNC_MAX_ATTEMPTS:
+        return None
+    return min(config.OG_SYNC_BACKOFF_BASE * (2 ** (attempts - 1)), config.OG_SYNC_BACKOFF_MAX)
+
+
+class SyncWorker:
+    """Polls the queue in a daemon thread; ``notify()`` wakes it up early."""
+
+    def __init__(self, poll_interval: float = 5):
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the worker thread once per process."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="og-sync-worker", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            logger.info("OurGroceries sync worker started")
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                while not self._stop.is_set() and self.process_one():
+                    pass
+            except Exception:
+                logger.exception("OurGroceries sync worker iteration failed")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def process_one(self) -> bool:
+        """Claim and send one due job. Returns False when the queue has nothing due."""
+        job = db.claim_og_sync_job(stale_after=config.OG_TIMEOUT * 2)
+        if job is None:
+            return False
+
+        names = [name for _, name in job["items"]]
+        ok, error = og.send_items_to_og_sync(job["list_name"], names) if names else (True, None)
+        if ok:
+            db.complete_og_sync_job(job["id"])
+            logger.info(f"OurGroceries sync job {job['id']} sent {len(names)} items")
+            return True
+
+        attempts = job["attempts"] + 1
+        delay = retry_delay(attempts)
+        status = db.fail_og_sync_job(job["id"], error, delay)
+        if status == "failed":
+            logger.error(f"OurGroceries sync job {job['id']} failed after {attempts} attempts: {error}")
+        else:
+            logger.warning(f"OurGroceries sync job {job['id']} attempt {attempts} failed, retrying in {delay}s: {error}")
+        return True
+
+
+worker = SyncWorker()
+
+
+def enqueue(list_name: str, items) -> Optional[int]:
+    """Queue items for OurGroceries and wake the worker. Returns the job id."""
+    job_id = db.enqueue_og_sync(list_name, items)
+    if job_id is not None:
+        worker.start()
+        worker.notify()
+    return job_id
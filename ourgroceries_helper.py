@@ -1,7 +1,15 @@
 import asyncio
+import atexit
 import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+import aiohttp
 from ourgroceries import OurGroceries
+from ourgroceries.exceptions import InvalidLoginException
 import config
+import metrics
 
 # Configure basic logging to stdout
 logging.basicConfig(level=logging.INFO)
@@ -62,42 +70,177 @@ async def _get_or_create_list(og: OurGroceries, list_name: str) -> str:
     logger.info(f"Created new OurGroceries list '{list_name}' with raw ID {new_list}")
     return new_list
 
+@contextmanager
+def _timed(operation: str):
+    """Record how long an OurGroceries operation took and whether it failed."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        metrics.OG_SECONDS.observe(time.perf_counter() - start, operation, outcome)
+
+def _is_session_error(error: BaseException) -> bool:
+    """
+    True if ``error`` (or its cause) means the session was rejected, so the
+    request was not applied and can safely be retried after logging in again.
+
+    An expired session gets the sign-in page (HTML) or a 401/403 instead of JSON.
+    """
+    while error is not None:
+        if isinstance(error, (InvalidLoginException, aiohttp.ContentTypeError)):
+            return True
+        if isinstance(error, aiohttp.ClientResponseError) and error.status in (401, 403):
+            return True
+        error = error.__cause__
+    return False
+
+class OGSession:
+    """
+    Long-lived OurGroceries session running on a background event loop.
+
+    Logs in once, caches resolved list ids by name, and logs in again (once)
+    only when the session was rejected, e.g. because the cookie expired.
+    """
+
+    def __init__(self, username: str, password: str):
+        self._username = username
+        self._password = password
+        self._client: OurGroceries | None = None
+        self._list_ids: dict[str, str] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._start_lock = threading.Lock()
+        self._login_lock: asyncio.Lock | None = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background loop on first use (and again in a forked worker)."""
+        with self._start_lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._login_lock = None
+                self._client = None
+                self._list_ids.clear()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="ourgroceries-loop", daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+            return self._loop
+
+    def run(self, coro, timeout: float | None = None):
+        """
+        Run a coroutine on the session loop from sync code and return its result.
+
+        On timeout the coroutine is cancelled, so it cannot complete after the
+        caller has given up on it.
+
+        Raises:
+            TimeoutError: If the coroutine did not finish within ``timeout``
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        loop = self._loop
+        if loop is not None and self._pid == os.getpid():
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout=5)
+            loop.close()
+        self._loop = None
+
+    async def _login(self, force: bool = False) -> OurGroceries:
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            if force:
+                self._client = None
+                self._list_ids.clear()
+            if self._client is None:
+                logger.debug(f"Logging into OurGroceries as {self._username}")
+                client = OurGroceries(self._username, self._password)
+                with _timed("login"):
+                    await client.login()
+                self._client = client
+                logger.info("Logged into OurGroceries")
+            return self._client
+
+    async def _list_id(self, og: OurGroceries, list_name: str) -> str:
+        list_id = self._list_ids.get(list_name)
+        if list_id is None:
+            with _timed("resolve_list"):
+                list_id = await _get_or_create_list(og, list_name)
+            self._list_ids[list_name] = list_id
+        return list_id
+
+    async def add_items(self, list_name: str, items: list[str]) -> None:
+        """
+        Add items to the named list, logging in again and retrying once if
+        the session was rejected. Other failures are not retried here: the
+        add may already have been applied upstream.
+
+        Raises:
+            RuntimeError: if the operation fails
+        """
+        for attempt in (1, 2):
+            try:
+                og = await self._login(force=attempt > 1)
+                list_id = await self._list_id(og, list_name)
+                with _timed("add_items"):
+                    await og.add_items_to_list(list_id, items)
+                return
+            except Exception as e:
+                if attempt > 1 or not _is_session_error(e):
+                    raise RuntimeError(f"OurGroceries sync failed: {e}") from e
+                logger.warning(f"OurGroceries session rejected ({e}); logging in again and retrying")
+
+
+_session: OGSession | None = None
+_session_lock = threading.Lock()
+
+def get_session() -> OGSession:
+    """Return the process-wide OurGroceries session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = OGSession(config.OG_USERNAME, config.OG_PASSWORD)
+            atexit.register(_session.close)
+        return _session
+
 async def add_items_to_og(list_name: str, items: list[str]):
     """
-    Log in, ensure the target shopping list exists (creating it if necessary),
-    and send all items to it.
+    Ensure the target shopping list exists (creating it if necessary) and
+    send all items to it, using the shared logged-in session.
+
+    Must run on the session loop, see ``send_items_to_og_sync``.
 
     Raises:
         RuntimeError: if any OurGroceries operation fails
     """
-    try:
-        logger.debug(f"Logging into OurGroceries as {config.OG_USERNAME}")
-        og = OurGroceries(config.OG_USERNAME, config.OG_PASSWORD)
-        await og.login()
-        logger.debug("Login successful")
-
-        list_id = await _get_or_create_list(og, list_name)
-        logger.debug(f"Using OurGroceries list ID {list_id}")
-
-        logger.debug(f"Adding items to OG list: {items}")
-        await og.add_items_to_list(list_id, items)
-        logger.info(f"Added {len(items)} items to OurGroceries list '{list_name}'")
-    except Exception as e:
-        logger.exception("Error syncing items to OurGroceries")
-        # Provide context for failures
-        raise RuntimeError(f"OurGroceries sync failed: {e}") from e
+    logger.debug(f"Adding items to OG list: {items}")
+    await get_session().add_items(list_name, items)
+    logger.info(f"Added {len(items)} items to OurGroceries list '{list_name}'")
 
 # Convenience synchronous wrapper
 
 def send_items_to_og_sync(list_name: str, items: list[str]) -> tuple[bool, str | None]:
     """
-    Run the async add_items_to_og from sync context.
+    Run the async add_items_to_og on the session's background loop.
 
     Returns:
         (success, error_message)
     """
     try:
-        asyncio.run(add_items_to_og(list_name, items))
+        with _timed("sync"):
+            get_session().run(add_items_to_og(list_name, items), timeout=config.OG_TIMEOUT)
         return True, None
     except Exception as e:
+        logger.exception("Error syncing items to OurGroceries")
         return False, str(e)
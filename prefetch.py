@@ -0,0 +1,70 @@
+"""
+Periodic background prefetcher that keeps the in-process caches warm.
+
+The actual warming work (meal plans, recipes, images) is supplied by the app
+as a callable; this module only handles scheduling, jitter and shutdown, so
+it also runs other periodic housekeeping tasks.
+"""
+import atexit
+import os
+import random
+import threading
+from typing import Callable, Optional
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class Prefetcher:
+    """
+    Run ``task`` every ``interval`` seconds (plus up to ``jitter`` seconds of
+    random delay) in a daemon thread. An interval of 0 disables it.
+    """
+
+    def __init__(self, task: Callable[[], None], interval: float, jitter: float = 0, name: str = "prefetcher"):
+        self.task = task
+        self.name = name
+        self.interval = interval
+        self.jitter = jitter
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        """Start the prefetch thread once per process; the first run is immediate."""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+            logger.info(f"{self.name} started (every {self.interval}s, jitter {self.jitter}s)")
+
+    def stop(self, timeout: float = 5) -> None:
+        """Ask the thread to exit and wait for the current run to finish."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+
+    def run_once(self) -> None:
+        try:
+            self.task()
+            self.runs += 1
+        except Exception:
+            self.failures += 1
+            logger.exception(f"{self.name} run failed")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            delay = self.interval + random.uniform(0, self.jitter)
+            self._stop.wait(delay)
@@ -0,0 +1,173 @@
+"""
+Opt-in per-request profiling.
+
+``ProfilerMiddleware`` wraps the WSGI app, so every view is covered without
+touching it, and runs selected requests under cProfile, including the time
+spent producing a streamed body. Each profile is saved to a directory that
+keeps only the newest files; the file name records the endpoint and the
+request duration so the slowest captures can be listed cheaply.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from werkzeug.exceptions import HTTPException
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_FILE_RE = re.compile(r"^(?P<endpoint>[\w.]+)--(?P<ms>\d+)ms--(?P<stamp>\d{8}T\d{6})-[0-9a-f]+\.prof$")
+
+
+def token_matches(supplied: Optional[str], token: str) -> bool:
+    """Constant-time check of an admin token; an unset token never matches."""
+    return bool(token) and bool(supplied) and hmac.compare_digest(supplied, token)
+
+
+class _ProfiledBody:
+    """Response iterable that keeps profiling until the server closes it."""
+
+    def __init__(self, body, profile: cProfile.Profile, finish):
+        self._body = body
+        self._profile = profile
+        self._finish = finish
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        try:
+            close = getattr(self._body, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._profile.disable()
+            self._finish()
+
+
+class ProfilerMiddleware:
+    """
+    Profile requests when ``always`` is set, or when the request carries the
+    admin ``token`` in an ``X-Profile`` header or a ``profile`` query parameter.
+    """
+
+    def __init__(self, wsgi_app, url_map, directory: str, keep: int = 50,
+                 token: str = "", always: bool = False, exclude=("profiles", "profile_detail", "static")):
+        self.wsgi_app = wsgi_app
+        self.url_map = url_map
+        self.directory = os.path.abspath(directory)
+        self.keep = keep
+        self.token = token
+        self.always = always
+        self.exclude = set(exclude)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _requested(self, environ) -> bool:
+        if self.always:
+            return True
+        if not self.token:
+            return False
+        supplied = environ.get("HTTP_X_PROFILE")
+        if not supplied and "profile=" in environ.get("QUERY_STRING", ""):
+            supplied = parse_qs(environ["QUERY_STRING"]).get("profile", [None])[0]
+        return token_matches(supplied, self.token)
+
+    def _endpoint(self, environ) -> str:
+        try:
+            endpoint, _ = self.url_map.bind_to_environ(environ).match()
+            return endpoint
+        except HTTPException:
+            return "unmatched"
+
+    def __call__(self, environ, start_response):
+        if not self._requested(environ):
+            return self.wsgi_app(environ, start_response)
+        endpoint = self._endpoint(environ)
+        if endpoint in self.exclude:
+            return self.wsgi_app(environ, start_response)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except (ValueError, RuntimeError):
+            # Another profiler is already active on this thread
+            return self.wsgi_app(environ, start_response)
+        started = time.perf_counter()
+        try:
+            body = self.wsgi_app(environ, start_response)
+        except BaseException:
+            profile.disable()
+            raise
+        return _ProfiledBody(body, profile, lambda: self._save(profile, endpoint, time.perf_counter() - started))
+
+    def _save(self, profile: cProfile.Profile, endpoint: str, duration: float) -> None:
+        name = (
+            f"{endpoint}--{int(duration * 1000)}ms--"
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.prof"
+        )
+        try:
+            profile.dump_stats(os.path.join(self.directory, name))
+            self._rotate()
+        except OSError as e:
+            logger.warning(f"Failed to save profile {name}: {e}")
+            return
+        logger.info(f"Saved profile {name}")
+
+    def _rotate(self) -> None:
+        """Delete the oldest profiles beyond ``keep``."""
+        paths = [os.path.join(self.directory, n) for n in os.listdir(self.directory) if _FILE_RE.match(n)]
+        if len(paths) <= self.keep:
+            return
+        paths.sort(key=lambda p: os.stat(p).st_mtime)
+        for path in paths[:len(paths) - self.keep]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(directory: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """Return saved profiles, slowest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        match = _FILE_RE.match(name)
+        if match is None:
+            continue
+        profiles.append({
+            "name": name,
+            "endpoint": match["endpoint"],
+            "duration_ms": int(match["ms"]),
+            "captured_at": time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.strptime(match["stamp"], "%Y%m%dT%H%M%S")
+            ),
+        })
+    profiles.sort(key=lambda p: p["duration_ms"], reverse=True)
+    return profiles[:limit]
+
+
+def profile_path(directory: str, name: str) -> Optional[str]:
+    """Return the path of a saved profile, or None if ``name`` is not one."""
+    if not _FILE_RE.match(name):
+        return None
+    path = os.path.join(os.path.abspath(directory), name)
+    return path if os.path.isfile(path) else None
+
+
+def profile_summary(path: str, sort: str = "cumulative", limit: int = 40) -> str:
+    """Render the top ``limit`` functions of a saved profile as text."""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
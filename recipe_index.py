@@ -0,0 +1,94 @@
+"""
+Local slug -> recipe index.
+
+Adding a recipe to the meal plan only needs its id (and a summary for the
+local mirror), so instead of downloading the full recipe the planner looks
+the slug up in ``recipe_index``. The index is filled from Mealie's recipe
+listing, which returns summaries without ingredients or instructions, and is
+refreshed in the background once it is older than ``max_age``.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+import db
+from logging_config import get_logger
+from mealie_client import MealieClient
+from resilience import BackgroundRefresher, SingleFlight
+
+logger = get_logger(__name__)
+
+
+def summary_to_row(recipe: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Mealie recipe (summary or full) to a ``recipe_index`` row."""
+    return {
+        "slug": recipe["slug"],
+        "id": recipe["id"],
+        "name": recipe.get("name"),
+        "description": recipe.get("description"),
+        "prep_time": recipe.get("prepTime"),
+        "perform_time": recipe.get("performTime"),
+        "updated_at": recipe.get("dateUpdated") or recipe.get("updatedAt"),
+    }
+
+
+def row_to_summary(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a ``recipe_index`` row to the recipe summary shape Mealie uses."""
+    return {
+        "id": row["id"],
+        "slug": row["slug"],
+        "name": row["name"],
+        "description": row["description"],
+        "prepTime": row["prep_time"],
+        "performTime": row["perform_time"],
+        "dateUpdated": row["updated_at"],
+    }
+
+
+class RecipeIndex:
+    """Keeps ``recipe_index`` in step with Mealie's recipe listing."""
+
+    def __init__(self, client: MealieClient, max_age: float = 3600, page_size: int = 100, page_workers: int = 4,
+                 refresher: Optional[BackgroundRefresher] = None):
+        self.client = client
+        self.max_age = max_age
+        self.page_size = page_size
+        self.page_workers = page_workers
+        self.refresher = refresher
+        self.flights = SingleFlight("recipe_index")
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Replace the index with Mealie's current recipe listing.
+
+        Raises:
+            MealieError: If Mealie cannot be reached
+        """
+        return self.flights.do("all", self._sync)
+
+    def _sync(self) -> Dict[str, int]:
+        rows = [
+            summary_to_row(recipe)
+            for recipe in self.client.iter_recipe_summaries(per_page=self.page_size, max_workers=self.page_workers)
+            if recipe.get("slug") and recipe.get("id")
+        ]
+        result = db.replace_recipe_index(rows)
+        logger.info(f"Indexed {result['indexed']} recipes ({result['deleted']} removed)")
+        return result
+
+    def is_stale(self) -> bool:
+        age = db.get_recipe_index_age()
+        return age is None or age > self.max_age
+
+    def refresh(self) -> None:
+        """Schedule a background sync if the index is missing or older than ``max_age``."""
+        if self.refresher is not None and self.is_stale():
+            self.refresher.submit("recipe_index", self.sync)
+
+    def lookup(self, slugs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the summaries of the indexed ``slugs``; unknown slugs are left out."""
+        return {slug: row_to_summary(row) for slug, row in db.get_indexed_recipes(slugs).items()}
+
+    def record(self, recipes: Iterable[Dict[str, Any]]) -> None:
+        """Index recipes fetched some other way, e.g. created after the last sync."""
+        db.upsert_recipe_index([
+            summary_to_row(recipe) for recipe in recipes if recipe.get("slug") and recipe.get("id")
+        ])
@@ -0,0 +1,253 @@
+"""
+Resilience helpers for calls to Mealie.
+
+``CircuitBreaker`` stops sending requests to an upstream that keeps failing,
+so pages fail fast (and fall back to local data) instead of waiting out every
+timeout. ``BackgroundRefresher`` runs refreshes of stale data off the request
+path, one per key, retrying with backoff while the upstream is unavailable.
+``SingleFlight`` lets concurrent callers asking for the same resource share
+one upstream request.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitBreaker:
+    """
+    Closed while calls succeed. After ``failure_threshold`` consecutive
+    failures it opens and ``allow()`` refuses calls for ``reset_timeout``
+    seconds; then a single trial call is let through (half-open), which closes
+    the breaker on success or opens it again on failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, name: str = "circuit"):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being refused or only a trial call is allowed."""
+        return self.state != self.CLOSED
+
+    def allow(self) -> bool:
+        """Return whether a call may be made now."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN:
+                # One trial at a time; a trial that never reported back is
+                # given up on after another reset_timeout
+                now = time.monotonic()
+                if self._trial_started is None or now - self._trial_started >= self.reset_timeout:
+                    self._trial_started = now
+                    return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.name} circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None:
+                # A failed trial call re-opens the breaker for another cooldown
+                self._opened_at = time.monotonic()
+                self._trial_started = None
+            elif self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self.trips += 1
+                logger.warning(
+                    f"{self.name} circuit opened after {self._failures} consecutive failures; "
+                    f"retrying in {self.reset_timeout}s"
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state(),
+                "consecutive_failures": self._failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+class BackgroundRefresher:
+    """
+    Run refresh tasks in one daemon thread, keyed so each piece of data has at
+    most one refresh pending. A task that raises is retried after
+    ``retry_delay`` seconds, doubling up to ``max_retry_delay``, and dropped
+    after ``max_attempts`` tries; the next stale read schedules it again.
+    """
+
+    def __init__(self, retry_delay: float = 5, max_retry_delay: float = 60,
+                 max_attempts: int = 5, name: str = "refresher"):
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max(1, max_attempts)
+        self.name = name
+        # key -> (task, due time, attempts so far)
+        self._pending: Dict[Hashable, Tuple[Callable[[], Any], float, int]] = {}
+        self._running: Optional[Hashable] = None
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.completed = 0
+        self.failures = 0
+
+    def submit(self, key: Hashable, task: Callable[[], Any]) -> bool:
+        """
+        Schedule ``task`` to run soon unless a refresh for ``key`` is already
+        pending or running.
+
+        Returns:
+            bool: True if the task was scheduled
+        """
+        with self._cond:
+            if key in self._pending or key == self._running:
+                return False
+            self._pending[key] = (task, time.monotonic(), 0)
+            self._ensure_thread()
+            self._cond.notify()
+            return True
+
+    def pending(self, key: Hashable) -> bool:
+        with self._cond:
+            return key in self._pending or key == self._running
+
+    def _ensure_thread(self) -> None:
+        """Start the worker thread once per process. Call with the lock held."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._pid = os.getpid()
+
+    def _next(self) -> Tuple[Hashable, Callable[[], Any], int]:
+        """Wait for the earliest due task and claim it."""
+        with self._cond:
+            while True:
+                if self._pending:
+                    key, (task, due, attempts) = min(self._pending.items(), key=lambda item: item[1][1])
+                    wait = due - time.monotonic()
+                    if wait <= 0:
+                        del self._pending[key]
+                        self._running = key
+                        return key, task, attempts
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            key, task, attempts = self._next()
+            try:
+                task()
+                self.completed += 1
+                failed = False
+            except Exception as e:
+                self.failures += 1
+                failed = True
+                logger.warning(f"{self.name}: refresh of {key} failed (attempt {attempts + 1}): {e}")
+            with self._cond:
+                self._running = None
+                if failed and attempts + 1 < self.max_attempts and key not in self._pending:
+                    delay = min(self.retry_delay * (2 ** attempts), self.max_retry_delay)
+                    self._pending[key] = (task, time.monotonic() + delay, attempts + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"pending": len(self._pending), "completed": self.completed, "failures": self.failures}
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key: the first caller runs the
+    function and everyone who asks for that key while it is running waits for
+    it and gets the same result, or the same exception.
+    """
+
+    def __init__(self, name: str = "single-flight"):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_flight": len(self._flights), "calls": self.calls, "coalesced": self.coalesced}
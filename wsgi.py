@@ -0,0 +1,8 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import app
+
+__all__ = ["app"]